@@ -3,14 +3,41 @@ from .utils import (
     objective_function
 )
 
-from .steepestAscent import steepest_ascent_algorithm
+from .steepestAscent import steepest_ascent_algorithm, steepest_ascent_stream
 
-from .sidewaysMove import sideways_move_algorithm
+from .sidewaysMove import sideways_move_algorithm, sideways_move_stream
 
-from .randomRestart import random_restart_algorithm
+from .randomRestart import random_restart_algorithm, random_restart_stream
 
-from .simulatedAnnealing import simulated_annealing_algorithm
+from .simulatedAnnealing import simulated_annealing_algorithm, simulated_annealing_stream
 
-from .stochastic import stochastic_algorithm
+from .stochastic import stochastic_algorithm, stochastic_stream
 
-from .genetic import genetic_algorithm
\ No newline at end of file
+from .genetic import check_genetic_params, genetic_algorithm, genetic_stream
+
+from .tabu import tabu_search_algorithm, tabu_search_stream
+
+algorithm_map = {
+    'steepest': steepest_ascent_algorithm,
+    'sideways': sideways_move_algorithm,
+    'stochastic': stochastic_algorithm,
+    'random': random_restart_algorithm,
+    'simulated': simulated_annealing_algorithm,
+    'genetic': genetic_algorithm,
+    'tabu': tabu_search_algorithm
+}
+
+stream_map = {
+    'steepest': steepest_ascent_stream,
+    'sideways': sideways_move_stream,
+    'stochastic': stochastic_stream,
+    'random': random_restart_stream,
+    'simulated': simulated_annealing_stream,
+    'genetic': genetic_stream,
+    'tabu': tabu_search_stream
+}
+
+# Pemeriksaan nilai params per algoritma, dipanggil dengan params yang namanya sama sebelum run dikirim ke worker
+param_checks = {
+    'genetic': check_genetic_params
+}
@@ -0,0 +1,166 @@
+from functools import lru_cache
+import random
+from typing import Sequence, Tuple
+import numpy as np
+from . import metrics, utils
+from .neighborhood import PairOrder, pair_count, pair_index, pairs_at
+
+# Banyak pasangan swap yang dievaluasi sekaligus, menjaga matriks (garis x pasangan) tetap kecil
+PAIR_CHUNK = 2048
+# Banyak indeks pasangan yang di-decode sekaligus saat menelusuri seluruh tetangga
+SCAN_CHUNK = 65536
+
+@lru_cache(maxsize=None)
+def line_mask(N: int) -> np.ndarray:
+    """Returns an (L, N³) 0/1 matrix marking which cells belong to each line."""
+    lines = utils.line_table(N)
+    mask = np.zeros((len(lines), N * N * N), dtype=np.int64)
+    for line_id, line in enumerate(lines):
+        for cell in line:
+            mask[line_id, cell] += 1
+    mask.setflags(write=False)
+    return mask
+
+def as_cell_matrix(cubes) -> np.ndarray:
+    """Stacks a batch of cubes ((B, N, N, N), (B, N³) or a list of flat cubes) into a (B, N³) array."""
+    if isinstance(cubes, np.ndarray):
+        return cubes.reshape(len(cubes), -1).astype(np.int64, copy=False)
+    if all(isinstance(cube, utils.FlatCube) for cube in cubes):
+        # Buffer flat cukup digabung jadi satu blok byte, tanpa iterasi per sel
+        cells = np.frombuffer(b"".join(cube.tobytes() for cube in cubes), dtype=np.int32)
+        return cells.reshape(len(cubes), -1).astype(np.int64)
+    return np.array([np.ravel(cube) for cube in cubes], dtype=np.int64)
+
+@lru_cache(maxsize=None)
+def line_member(N: int) -> np.ndarray:
+    """Returns the line mask as booleans with an extra all-False row for the dummy line L."""
+    mask = line_mask(N)
+    member = np.vstack([mask, np.zeros((1, mask.shape[1]), dtype=mask.dtype)]) > 0
+    member.setflags(write=False)
+    return member
+
+@lru_cache(maxsize=None)
+def cell_line_matrix(N: int) -> np.ndarray:
+    """Returns an (N³, K) matrix of the line ids through each cell, padded with the dummy line L."""
+    cell_lines = utils.cell_line_table(N)
+    pad = len(utils.line_table(N))
+    width = max(len(lines) for lines in cell_lines)
+    matrix = np.full((len(cell_lines), width), pad, dtype=np.intp)
+    for cell, lines in enumerate(cell_lines):
+        matrix[cell, :len(lines)] = lines
+    matrix.setflags(write=False)
+    return matrix
+
+@metrics.instrument("evaluation", "delta_evaluations", size=lambda cube, pairs, sums=None: len(pairs))
+def batch_swap_cost(cube, pairs: Sequence[Sequence[int]], sums: Sequence[int] | None = None) -> np.ndarray:
+    """Calculates the cost of swapping each (a, b) pair of flat indices on a base cube.
+
+    Only the lines through a or b are touched: a swap shifts every line through a by
+    cells[b] - cells[a] and every line through b by the opposite amount, except the
+    lines that contain both cells.
+    """
+    if isinstance(cube, utils.FlatCube):
+        cells = np.frombuffer(cube, dtype=np.int32).astype(np.int64)
+    else:
+        cells = np.ravel(np.asarray(cube, dtype=np.int64))
+    N = utils.cube_size(cells)
+    magic_number = utils.calculate_magic_number(N)
+    mask = line_mask(N)
+    cell_lines = cell_line_matrix(N)
+    pad = len(mask)
+
+    # Garis dummy di indeks terakhir: tidak memuat sel apa pun dan tidak pernah menyumbang cost
+    base_sums = mask @ cells if sums is None else np.asarray(sums, dtype=np.int64)
+    base_cost = int(np.abs(magic_number - base_sums).sum())
+    deviation = np.append(magic_number - base_sums, 0)
+    member = line_member(N)
+
+    pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 2)
+    costs = np.empty(len(pairs), dtype=np.int64)
+    for start in range(0, len(pairs), PAIR_CHUNK):
+        a = pairs[start:start + PAIR_CHUNK, 0]
+        b = pairs[start:start + PAIR_CHUNK, 1]
+        diff = (cells[b] - cells[a])[:, None]
+        delta = np.zeros(len(a), dtype=np.int64)
+        for cell, other, change in ((a, b, diff), (b, a, -diff)):
+            lines = cell_lines[cell]
+            affected = (lines != pad) & ~member[lines, other[:, None]]
+            old = deviation[lines]
+            delta += np.where(affected, np.abs(old - change) - np.abs(old), 0).sum(axis=1)
+        costs[start:start + PAIR_CHUNK] = base_cost + delta
+    return costs
+
+def scan_best_swap(engine, rng: random.Random = random) -> Tuple[int, Tuple[int, int], int]:
+    """Scans every swap of a CostEngine's cube in a fresh random order for the lowest cost change.
+
+    Returns the change, its swap and the number of pairs scored. Pairs are decoded one
+    chunk at a time, so memory does not depend on N; ties go to the pair met first,
+    which the random order makes a uniform pick.
+    """
+    best_delta, best_pair, scanned = None, (-1, -1), 0
+    for chunk in PairOrder(engine.N, rng).chunks(SCAN_CHUNK):
+        deltas = batch_swap_cost(engine.cells, chunk, engine.sums) - engine.cost
+        scanned += len(chunk)
+        index = int(np.argmin(deltas))
+        if best_delta is None or deltas[index] < best_delta:
+            best_delta, best_pair = int(deltas[index]), (int(chunk[index, 0]), int(chunk[index, 1]))
+    return best_delta, best_pair, scanned
+
+class SwapDeltaTable:
+    """Keeps the cost change of every swap on a CostEngine's cube, refreshed only where a move can change it.
+
+    A swap of a and b changes the deviation of the lines through exactly one of them, so
+    only pairs touching a cell on such a line (or a and b themselves) need rescoring.
+    Only the deltas are stored, one per pair index; pairs are decoded when needed.
+    """
+
+    def __init__(self, engine, rng: np.random.Generator | None = None):
+        self.engine = engine
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.member = line_mask(engine.N) > 0
+        self.deltas = np.empty(pair_count(engine.N), dtype=np.int64)
+        # Banyak pasangan yang dinilai sejak take_evaluations terakhir
+        self.evaluations = 0
+        for start in range(0, len(self.deltas), SCAN_CHUNK):
+            self._rescore(np.arange(start, min(start + SCAN_CHUNK, len(self.deltas))))
+
+    def _rescore(self, indices: np.ndarray) -> None:
+        engine = self.engine
+        self.deltas[indices] = batch_swap_cost(engine.cells, pairs_at(indices, engine.N), engine.sums) - engine.cost
+        self.evaluations += len(indices)
+
+    def take_evaluations(self) -> int:
+        """Returns the number of pairs scored since the last call."""
+        evaluations, self.evaluations = self.evaluations, 0
+        return evaluations
+
+    def refresh(self, a: int, b: int) -> None:
+        """Updates the table after the engine has swapped cells a and b."""
+        N = self.engine.N
+        cell_lines = self.engine.cell_lines
+        changed = list(set(cell_lines[a]).symmetric_difference(cell_lines[b]))
+        dirty = self.member[changed].any(axis=0)
+        dirty[[a, b]] = True
+
+        # Semua pasangan yang memuat sel kotor, ditandai lewat indeksnya
+        dirty_cells = np.flatnonzero(dirty)[:, None]
+        others = np.arange(len(dirty))[None, :]
+        stale = np.zeros(len(self.deltas), dtype=bool)
+        stale[pair_index(dirty_cells, others, N)[dirty_cells != others]] = True
+        self._rescore(np.flatnonzero(stale))
+
+    def pair(self, index: int) -> Tuple[int, int]:
+        """Returns the swap of a pair index."""
+        pos1, pos2 = pairs_at([index], self.engine.N)[0]
+        return int(pos1), int(pos2)
+
+    def best_index(self, allowed: np.ndarray | None = None) -> int:
+        """Returns the index of the lowest cost change among the allowed pairs, breaking ties at random."""
+        deltas = self.deltas if allowed is None else np.where(allowed, self.deltas, np.iinfo(np.int64).max)
+        ties = np.flatnonzero(deltas == deltas.min())
+        return int(ties[self.rng.integers(len(ties))])
+
+    def best(self) -> Tuple[int, Tuple[int, int]]:
+        """Returns the lowest cost change and its swap, breaking ties at random."""
+        index = self.best_index()
+        return int(self.deltas[index]), self.pair(index)
@@ -0,0 +1,219 @@
+import time
+import inspect
+import multiprocessing
+from typing import Callable, Dict, Union, List
+from . import utils
+from .evaluators import get_evaluator
+
+# Alasan berhenti yang dilaporkan di hasil run
+STOP_REASONS = ("finished", "target", "evaluations", "time", "stall")
+
+class RunBudget:
+    """Limits of one run, checked after every progress event; None means unlimited.
+
+    max_evaluations counts the candidate evaluations reported by the events, time_limit
+    is wall-clock seconds from the start of the run, target_cost stops once the best cost
+    is at or below it and stall_limit stops after that many events without a new best.
+    """
+
+    def __init__(self, max_evaluations: int | None = None, time_limit: float | None = None,
+                 target_cost: float | None = None, stall_limit: int | None = None):
+        for name, value in (("max_evaluations", max_evaluations), ("time_limit", time_limit),
+                            ("stall_limit", stall_limit)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive")
+        self.max_evaluations = max_evaluations
+        self.time_limit = time_limit
+        self.target_cost = target_cost
+        self.stall_limit = stall_limit
+
+    def __repr__(self) -> str:
+        return f"RunBudget({', '.join(f'{name}={value!r}' for name, value in self.to_dict().items())})"
+
+    def to_dict(self) -> Dict:
+        return {
+            "max_evaluations": self.max_evaluations,
+            "time_limit": self.time_limit,
+            "target_cost": self.target_cost,
+            "stall_limit": self.stall_limit,
+        }
+
+    @property
+    def unlimited(self) -> bool:
+        return all(value is None for value in self.to_dict().values())
+
+class BudgetExhausted(Exception):
+    """Thrown into an algorithm stream by limit_stream when the budget runs out.
+
+    A stream may catch it at a yield, stop its workers and return its own summary;
+    streams that do not are closed and replaced by the best state seen in the events.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class SharedLimits:
+    """The limits of a run shared with the worker processes of a parallel algorithm.
+
+    Workers get it through the pool initializer (install_limits) and call exhausted()
+    between probes, segments or generations, so the run stops on time even while the
+    parent is still waiting for them. The evaluation count and the best cost are summed
+    and tracked across all workers. A job cancelled while the limits exist also stops them
+    (see install_cancel_flag).
+    """
+
+    def __init__(self, budget: RunBudget | None = None, time_limit: float | None = None,
+                 target_cost: float | None = None):
+        budget = budget or RunBudget()
+        time_limits = [limit for limit in (time_limit, budget.time_limit) if limit is not None]
+        targets = [target for target in (target_cost, budget.target_cost) if target is not None]
+        self.deadline = time.time() + min(time_limits) if time_limits else None
+        self.target_cost = max(targets) if targets else None
+        self.max_evaluations = budget.max_evaluations
+        self.evaluations = multiprocessing.Value('q', 0)
+        self.best_cost = multiprocessing.Value('d', float('inf'))
+        self.stopped = multiprocessing.Value('b', 0)
+        self.cancelled = _cancel_flag
+
+    def count(self, evaluations: int) -> None:
+        if evaluations:
+            with self.evaluations.get_lock():
+                self.evaluations.value += evaluations
+
+    def publish(self, cost: float) -> float:
+        """Offers a cost to the shared incumbent and returns the best cost known so far."""
+        with self.best_cost.get_lock():
+            if cost < self.best_cost.value:
+                self.best_cost.value = cost
+            return self.best_cost.value
+
+    def stop(self) -> None:
+        """Asks every worker to stop at its next check."""
+        self.stopped.value = 1
+
+    def reason(self) -> str | None:
+        """Returns the limit that has been reached, or None."""
+        if self.target_cost is not None and self.best_cost.value <= self.target_cost:
+            return "target"
+        if self.max_evaluations is not None and self.evaluations.value >= self.max_evaluations:
+            return "evaluations"
+        if self.deadline is not None and time.time() >= self.deadline:
+            return "time"
+        return None
+
+    def exhausted(self) -> bool:
+        if self.stopped.value or (self.cancelled is not None and self.cancelled.value):
+            return True
+        return self.reason() is not None
+
+    def summary(self) -> Dict:
+        """Returns the evaluations counted by the workers and the limit that stopped them, if any."""
+        summary = {"evaluations": self.evaluations.value}
+        reason = self.reason()
+        if reason is not None:
+            summary["stopped_by"] = reason
+        return summary
+
+# Batas run di proses worker, dipasang oleh pool initializer
+_worker_limits: SharedLimits | None = None
+# Flag pembatalan job yang sedang berjalan di proses ini, dipasang oleh jobs.run_job
+_cancel_flag = None
+
+def install_cancel_flag(flag) -> None:
+    """Installs the cancel flag (a shared byte Value) that SharedLimits created from now on watch."""
+    global _cancel_flag
+    _cancel_flag = flag
+
+def install_limits(limits: SharedLimits) -> None:
+    """Pool initializer: installs the shared limits in a worker process."""
+    global _worker_limits
+    _worker_limits = limits
+
+def worker_limits() -> SharedLimits | None:
+    """Returns the limits installed in this worker, None outside a limited pool."""
+    return _worker_limits
+
+def budget_params(stream_function: Callable, params: Dict, budget: RunBudget | None) -> Dict:
+    """Adds the budget to the params of a stream that enforces it in its own workers."""
+    if budget is None or "budget" not in inspect.signature(stream_function).parameters:
+        return params
+    return {**params, "budget": budget}
+
+def limit_stream(stream: utils.AlgorithmStream, cube: Union[List[List[List[int]]], utils.FlatCube],
+                 budget: RunBudget) -> utils.AlgorithmStream:
+    """Forwards an algorithm stream until it finishes or the budget runs out.
+
+    The best state seen so far is tracked from the events. When the budget runs out,
+    BudgetExhausted is thrown into the stream; a stream that catches it returns its own
+    summary, otherwise it is closed. The best state replaces the summary's cube when it is
+    at least as good, and stopped_by names the limit that was hit. A run that finishes on
+    its own keeps its result, marked "finished" unless the stream names its own stop.
+    """
+    current = utils.as_flat_cube(cube)[:]
+    best_cube = None
+    best_cost = float('inf')
+    evaluations = 0
+    stall = 0
+    iteration = 0
+    start_time = time.perf_counter()
+    deadline = start_time + budget.time_limit if budget.time_limit is not None else None
+
+    while True:
+        try:
+            event = next(stream)
+        except StopIteration as stop:
+            result = stop.value
+            result.setdefault("evaluations", evaluations)
+            result.setdefault("stopped_by", "finished")
+            return result
+        yield event
+
+        iteration = event["iteration"]
+        evaluations += event["evaluations"]
+        if event["state"] is not None:
+            current = event["state"][:]
+            # Cost event state tidak selalu cost state itu sendiri (GA melaporkan rata-rata populasi)
+            cost = get_evaluator().cost(current)
+        else:
+            if event["swap"] is not None:
+                a, b = event["swap"]
+                current[a], current[b] = current[b], current[a]
+            cost = event["cost"]
+        if cost < best_cost:
+            best_cost = cost
+            best_cube = current[:]
+            stall = 0
+        else:
+            stall += 1
+
+        if budget.target_cost is not None and best_cost <= budget.target_cost:
+            stopped_by = "target"
+        elif budget.max_evaluations is not None and evaluations >= budget.max_evaluations:
+            stopped_by = "evaluations"
+        elif deadline is not None and time.perf_counter() >= deadline:
+            stopped_by = "time"
+        elif budget.stall_limit is not None and stall >= budget.stall_limit:
+            stopped_by = "stall"
+        else:
+            continue
+
+        try:
+            stream.throw(BudgetExhausted(stopped_by))
+        except StopIteration as stop:
+            result = stop.value
+        except BudgetExhausted:
+            result = {}
+        else:
+            # Stream tetap berjalan setelah dihentikan: ringkasannya tidak dipakai
+            stream.close()
+            result = {}
+        if best_cost <= result.get("final_cost", float('inf')):
+            result.update(final_cube=best_cube, final_cost=best_cost,
+                          average_cost=utils.average_cost(best_cost, utils.cube_size(best_cube)))
+        result.setdefault("duration", round(time.perf_counter() - start_time, 2))
+        result.setdefault("iteration", iteration)
+        # Stream paralel menghitung evaluasi di worker-nya sendiri, termasuk yang tidak menjadi event
+        result.setdefault("evaluations", evaluations)
+        result["stopped_by"] = stopped_by
+        return result
@@ -0,0 +1,140 @@
+from array import array
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+import numpy as np
+from . import utils
+from .costEngine import CostEngine
+
+# Seed tetap agar hash sebuah kubus sama di semua proses
+ZOBRIST_SEED = 0x5EED
+DEFAULT_CACHE_SIZE = 4096
+# Batas memori cache; untuk N besar satu entri bisa belasan KB
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+
+def splitmix64(value: int) -> int:
+    """Mixes an integer into a well-spread 64-bit key."""
+    value = (value + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return value ^ (value >> 31)
+
+def splitmix64_array(values: np.ndarray) -> np.ndarray:
+    """splitmix64 over a uint64 array; the multiplications wrap modulo 2⁶⁴ like the scalar version."""
+    values = values + np.uint64(0x9E3779B97F4A7C15)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+class ZobristHasher:
+    """Zobrist hashing of an N x N x N cube: the XOR of one pseudo-random key per (cell, value).
+
+    Keys are derived on the fly by mixing the cell, the value and the seed, so no
+    N³ x N³ key table is held. A swap updates the hash with four XORs.
+    """
+
+    def __init__(self, N: int, seed: int = ZOBRIST_SEED):
+        self.N = N
+        self.size = N * N * N
+        self.salt = splitmix64(seed)
+        # Bagian key yang hanya bergantung pada sel, untuk hash_batch
+        self.cell_bits = (np.arange(self.size, dtype=np.uint64) << np.uint64(32)) ^ np.uint64(self.salt)
+
+    def key(self, cell: int, value: int) -> int:
+        return splitmix64(((cell << 32) ^ (value & 0xFFFFFFFF)) ^ self.salt)
+
+    def hash(self, cells: utils.FlatCube) -> int:
+        """Hashes a flat cube from scratch."""
+        h = 0
+        for cell, value in enumerate(cells):
+            h ^= self.key(cell, value)
+        return h
+
+    def swap(self, h: int, cells: utils.FlatCube, a: int, b: int) -> int:
+        """Returns the hash after swapping cells a and b, given the hash and cells before the swap."""
+        value_a, value_b = cells[a], cells[b]
+        return h ^ self.key(a, value_a) ^ self.key(a, value_b) ^ self.key(b, value_b) ^ self.key(b, value_a)
+
+    def hash_batch(self, cells: np.ndarray) -> List[int]:
+        """Hashes every row of a (B, N³) cell matrix."""
+        values = (cells.astype(np.int64) & 0xFFFFFFFF).astype(np.uint64)
+        keys = splitmix64_array(self.cell_bits ^ values)
+        return np.bitwise_xor.reduce(keys, axis=1).tolist()
+
+@lru_cache(maxsize=None)
+def hasher(N: int) -> ZobristHasher:
+    """Returns the shared Zobrist hasher for cubes of size N."""
+    return ZobristHasher(N)
+
+class CostCache:
+    """Bounded LRU cache of (cost, line sums) keyed by Zobrist hash.
+
+    The cells are stored with each entry and compared on lookup, so a hash collision is
+    a miss rather than a wrong cost. Entries are evicted once either maxsize entries or
+    max_bytes of cells and sums are held.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[Tuple[int, int], Tuple[bytes, int, array]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, N: int, h: int, cells: bytes) -> Tuple[int, List[int]] | None:
+        """Returns the cached (cost, line sums) of a cube, or None."""
+        entry = self.entries.get((N, h))
+        if entry is None or entry[0] != cells:
+            self.misses += 1
+            return None
+        self.entries.move_to_end((N, h))
+        self.hits += 1
+        return entry[1], entry[2].tolist()
+
+    def put(self, N: int, h: int, cells: bytes, cost: int, sums: List[int]) -> None:
+        old = self.entries.pop((N, h), None)
+        if old is not None:
+            self.bytes -= self._size(old)
+        # Line sums disimpan sebagai array('q'), jauh lebih hemat daripada list int
+        entry = (cells, cost, array('q', sums))
+        self.entries[(N, h)] = entry
+        self.bytes += self._size(entry)
+        while len(self.entries) > self.maxsize or (self.bytes > self.max_bytes and len(self.entries) > 1):
+            self.bytes -= self._size(self.entries.popitem(last=False)[1])
+
+    @staticmethod
+    def _size(entry: Tuple[bytes, int, array]) -> int:
+        return len(entry[0]) + entry[2].itemsize * len(entry[2])
+
+    def score(self, cube: Union[List[List[List[int]]], utils.FlatCube]) -> int:
+        """Returns the objective of a cube, scoring it only if it is not cached yet."""
+        cells = utils.as_flat_cube(cube)
+        N = utils.cube_size(cells)
+        h = hasher(N).hash(cells)
+        cached = self.get(N, h, cells.tobytes())
+        if cached is not None:
+            return cached[0]
+        engine = CostEngine(cells)
+        self.put(N, h, cells.tobytes(), engine.cost, engine.sums)
+        return engine.cost
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# Cache bersama per proses, dipakai endpoint dan algoritma
+cost_cache = CostCache()
@@ -0,0 +1,84 @@
+from typing import List, Tuple, Union
+from . import metrics, utils
+from .evaluators import get_evaluator
+
+class CostEngine:
+    """Keeps cached line sums of a cube so swap costs only touch the affected lines."""
+
+    def __init__(self, cube: Union[List[List[List[int]]], utils.FlatCube]):
+        self.cells = utils.as_flat_cube(cube)[:]
+        N = utils.cube_size(self.cells)
+        self.N = N
+        self.magic_number = utils.calculate_magic_number(N)
+
+        # Tabel garis dipakai bersama oleh semua engine dengan N yang sama
+        self.lines = utils.line_table(N)
+        self.cell_lines = utils.cell_line_table(N)
+
+        self.sums = get_evaluator().line_sums(self.cells, N)
+        self.cost = sum(abs(self.magic_number - line_sum) for line_sum in self.sums)
+
+    @classmethod
+    def from_state(cls, cells: utils.FlatCube, sums: List[int], cost: int) -> "CostEngine":
+        """Wraps a cube whose line sums and cost are already known, without copying or rescoring it."""
+        engine = cls.__new__(cls)
+        engine.cells = cells
+        engine.N = utils.cube_size(cells)
+        engine.magic_number = utils.calculate_magic_number(engine.N)
+        engine.lines = utils.line_table(engine.N)
+        engine.cell_lines = utils.cell_line_table(engine.N)
+        engine.sums = sums
+        engine.cost = cost
+        return engine
+
+    def flat_index(self, pos: Tuple[int, int, int]) -> int:
+        """Converts an (i, j, k) position to its flat cell index."""
+        i, j, k = pos
+        return (i * self.N + j) * self.N + k
+
+    def position(self, cell: int) -> Tuple[int, int, int]:
+        """Converts a flat cell index back to its (i, j, k) position."""
+        N = self.N
+        return cell // (N * N), (cell // N) % N, cell % N
+
+    def _line_changes(self, a: int, b: int) -> List[Tuple[int, int]]:
+        """Returns (line, sum change) for every line whose sum changes when a and b swap."""
+        diff = self.cells[b] - self.cells[a]
+        if diff == 0:
+            return []
+        lines_a = self.cell_lines[a]
+        lines_b = self.cell_lines[b]
+        # Garis yang memuat kedua sel tidak berubah jumlahnya
+        changes = [(line, diff) for line in lines_a if line not in lines_b]
+        changes.extend((line, -diff) for line in lines_b if line not in lines_a)
+        return changes
+
+    @metrics.instrument("evaluation", "delta_evaluations")
+    def swap_delta(self, a: int, b: int) -> int:
+        """Returns the cost change of swapping cells a and b without applying it."""
+        magic_number = self.magic_number
+        sums = self.sums
+        delta = 0
+        for line, change in self._line_changes(a, b):
+            old_sum = sums[line]
+            delta += abs(magic_number - old_sum - change) - abs(magic_number - old_sum)
+        return delta
+
+    def swap(self, a: int, b: int, delta: int | None = None) -> int:
+        """Swaps cells a and b, updating the cached line sums and cost."""
+        if delta is None:
+            delta = self.swap_delta(a, b)
+        for line, change in self._line_changes(a, b):
+            self.sums[line] += change
+        self.cells[a], self.cells[b] = self.cells[b], self.cells[a]
+        self.cost += delta
+        return self.cost
+
+    @metrics.instrument("snapshot")
+    def snapshot(self) -> utils.FlatCube:
+        """Returns a copy of the current cells as a single buffer copy."""
+        return self.cells[:]
+
+    def to_cube(self) -> List[List[List[int]]]:
+        """Returns the current cells as a nested N x N x N list."""
+        return utils.unflatten_cube(self.cells)
@@ -0,0 +1,213 @@
+"""Evaluation backends behind one interface: line sums, full cost and batch cost.
+
+python is the reference, numpy vectorizes over the line tables and numba compiles the
+same loops when numba is importable. get_evaluator() returns the backend picked by
+select_backend(), which times every available backend once per process; the
+EVALUATOR_BACKEND environment variable overrides the choice.
+
+Swap deltas stay in CostEngine: with the line sums held in a Python list, its loop
+over the few affected lines is faster than calling into any backend.
+
+check_conformance() compares every backend with the reference on random cubes; run it
+with "python benchmark.py --check-evaluators" or through the test suite.
+"""
+import os
+import time
+import random
+from functools import lru_cache
+from typing import Callable, Dict, List, Sequence
+import numpy as np
+from . import metrics, utils
+from .batch import as_cell_matrix, line_mask
+
+try:
+    import numba
+except ImportError:  # numba opsional, tanpa numba backend numpy/python yang dipakai
+    numba = None
+
+# Ukuran kubus dan populasi untuk mengukur kecepatan backend saat pemilihan
+SELECT_N = 5
+SELECT_BATCH = 32
+SELECT_REPEAT = 20
+
+class Evaluator:
+    """Interface of an evaluation backend; subclasses implement the underscored kernels."""
+
+    name = "base"
+
+    @metrics.instrument("evaluation", "objective_evaluations")
+    def line_sums(self, cells: utils.FlatCube, N: int) -> List[int]:
+        """Returns the sum of every line of a flat cube."""
+        return self._line_sums(cells, N)
+
+    def cost(self, cube) -> int:
+        """Returns the objective of a cube."""
+        cells = utils.as_flat_cube(cube)
+        N = utils.cube_size(cells)
+        magic_number = utils.calculate_magic_number(N)
+        return sum(abs(magic_number - total) for total in self.line_sums(cells, N))
+
+    @metrics.instrument("evaluation", "objective_evaluations", size=lambda self, cubes: len(cubes))
+    def batch_line_sums(self, cubes) -> np.ndarray:
+        """Returns the (B, L) line sums of a batch of cubes."""
+        return self._batch_line_sums(as_cell_matrix(cubes))
+
+    def batch_cost(self, cubes) -> np.ndarray:
+        """Returns the objective of every cube in a batch."""
+        cells = as_cell_matrix(cubes)
+        magic_number = utils.calculate_magic_number(utils.cube_size(cells[0]))
+        return np.abs(magic_number - self.batch_line_sums(cells)).sum(axis=1)
+
+    def _line_sums(self, cells: utils.FlatCube, N: int) -> List[int]:
+        raise NotImplementedError
+
+    def _batch_line_sums(self, cells: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+class PythonEvaluator(Evaluator):
+    """Reference backend: plain loops over the line tables."""
+
+    name = "python"
+
+    def _line_sums(self, cells: utils.FlatCube, N: int) -> List[int]:
+        return [sum([cells[cell] for cell in line]) for line in utils.line_table(N)]
+
+    def _batch_line_sums(self, cells: np.ndarray) -> np.ndarray:
+        N = utils.cube_size(cells[0])
+        return np.array([self._line_sums(row, N) for row in cells.tolist()], dtype=np.int64).reshape(len(cells), -1)
+
+@lru_cache(maxsize=None)
+def line_matrix(N: int) -> np.ndarray:
+    """Returns the (L, N) matrix of the flat cells of every line."""
+    matrix = np.array(utils.line_table(N), dtype=np.intp)
+    matrix.setflags(write=False)
+    return matrix
+
+class NumpyEvaluator(Evaluator):
+    """Vectorized backend: gathers the cells of every line with one fancy index."""
+
+    name = "numpy"
+
+    def _line_sums(self, cells: utils.FlatCube, N: int) -> List[int]:
+        values = np.frombuffer(cells, dtype=np.int32) if isinstance(cells, utils.FlatCube) else np.asarray(cells)
+        return values[line_matrix(N)].sum(axis=1).tolist()
+
+    def _batch_line_sums(self, cells: np.ndarray) -> np.ndarray:
+        # Perkalian float memakai BLAS; nilainya bilangan bulat kecil sehingga hasilnya tetap eksak
+        mask = line_mask(utils.cube_size(cells[0]))
+        return np.rint(cells.astype(np.float64) @ mask.T.astype(np.float64)).astype(np.int64)
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _numba_line_sums(cells, lines):
+        sums = np.zeros(lines.shape[0], dtype=np.int64)
+        for line in range(lines.shape[0]):
+            total = 0
+            for n in range(lines.shape[1]):
+                total += cells[lines[line, n]]
+            sums[line] = total
+        return sums
+
+    # Tanpa parallel=True: worker pool di-fork dan sudah satu proses per core
+    @numba.njit(cache=True)
+    def _numba_batch_line_sums(cells, lines):
+        sums = np.zeros((cells.shape[0], lines.shape[0]), dtype=np.int64)
+        for row in range(cells.shape[0]):
+            for line in range(lines.shape[0]):
+                total = 0
+                for n in range(lines.shape[1]):
+                    total += cells[row, lines[line, n]]
+                sums[row, line] = total
+        return sums
+
+class NumbaEvaluator(Evaluator):
+    """JIT backend: the reference loops compiled by numba."""
+
+    name = "numba"
+
+    def _line_sums(self, cells: utils.FlatCube, N: int) -> List[int]:
+        values = np.frombuffer(cells, dtype=np.int32) if isinstance(cells, utils.FlatCube) else np.asarray(cells)
+        return _numba_line_sums(values, line_matrix(N)).tolist()
+
+    def _batch_line_sums(self, cells: np.ndarray) -> np.ndarray:
+        return _numba_batch_line_sums(np.ascontiguousarray(cells), line_matrix(utils.cube_size(cells[0])))
+
+backends: Dict[str, Callable[[], Evaluator]] = {
+    'python': PythonEvaluator,
+    'numpy': NumpyEvaluator,
+}
+if numba is not None:
+    backends['numba'] = NumbaEvaluator
+
+def available_backends() -> List[str]:
+    return list(backends)
+
+@lru_cache(maxsize=None)
+def evaluator(name: str) -> Evaluator:
+    """Returns the shared instance of a backend."""
+    if name not in backends:
+        raise ValueError(f"Unknown evaluator backend {name!r}, available: {available_backends()}")
+    return backends[name]()
+
+def time_backend(backend: Evaluator, N: int = SELECT_N, batch: int = SELECT_BATCH, repeat: int = SELECT_REPEAT) -> float:
+    """Times a fixed mix of single-cube and batch scoring, after one warm-up call (JIT compile)."""
+    rng = random.Random(0)
+    cubes = [utils.as_flat_cube(utils.initialize_random_cube(N, rng)) for _ in range(batch)]
+    cells = as_cell_matrix(cubes)
+    backend._line_sums(cubes[0], N)
+    backend._batch_line_sums(cells)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for cube in cubes[:4]:
+            backend._line_sums(cube, N)
+        backend._batch_line_sums(cells)
+    return time.perf_counter() - start
+
+@lru_cache(maxsize=None)
+def select_backend() -> str:
+    """Returns the name of the backend used by get_evaluator(), chosen once per process."""
+    forced = os.environ.get("EVALUATOR_BACKEND")
+    if forced:
+        evaluator(forced)
+        return forced
+    timings = {}
+    for name in available_backends():
+        try:
+            timings[name] = time_backend(evaluator(name))
+        except Exception:
+            # Backend yang gagal (misalnya kompilasi numba) tidak ikut dipilih
+            continue
+    return min(timings, key=timings.get)
+
+def get_evaluator(name: str | None = None) -> Evaluator:
+    """Returns the named backend, or the selected one."""
+    return evaluator(name or select_backend())
+
+def check_conformance(names: Sequence[str] | None = None, sizes: Sequence[int] = (2, 3, 4, 5, 7),
+                      trials: int = 20, seed: int = 0) -> Dict[str, List[str]]:
+    """Checks every backend against the python reference on random cubes.
+
+    Returns the mismatches per backend; an empty list means the backend conforms.
+    """
+    rng = random.Random(seed)
+    reference = evaluator('python')
+    failures = {name: [] for name in names or available_backends()}
+    for N in sizes:
+        for trial in range(trials):
+            cubes = [utils.as_flat_cube(utils.initialize_random_cube(N, rng)) for _ in range(4)]
+            cells = cubes[0]
+            expected = {
+                "line_sums": reference._line_sums(cells, N),
+                "cost": reference.cost(cells),
+                "batch_cost": [reference.cost(cube) for cube in cubes],
+            }
+            for name in failures:
+                backend = evaluator(name)
+                actual = {
+                    "line_sums": backend._line_sums(cells, N),
+                    "cost": backend.cost(cells),
+                    "batch_cost": backend.batch_cost(cubes).tolist(),
+                }
+                failures[name].extend(f"N={N} trial={trial}: {check} {actual[check]!r} != {expected[check]!r}"
+                                      for check in expected if actual[check] != expected[check])
+    return failures
@@ -1,97 +1,407 @@
 import time
 import random
-from typing import List, Dict
-from copy import deepcopy
-from . import utils
-
-def crossover(parent1: List[List[List[int]]], parent2: List[List[List[int]]], N: int) -> List[List[List[int]]]:
-    child = deepcopy(parent1)
-    for i in range(N):
-        for j in range(N):
-            for k in range(N):
-                if random.random() < 0.5:
-                    child[i][j][k] = parent2[i][j][k]
+from array import array
+from typing import Dict, Generator, List, Tuple
+import numpy as np
+from . import parallel, utils
+from .batch import as_cell_matrix
+from .budget import BudgetExhausted, RunBudget, SharedLimits, install_limits, worker_limits
+from .cache import cost_cache, hasher
+from .costEngine import CostEngine
+from .evaluators import get_evaluator
+from .history import collect_run
+from .seeding import Seed, make_rngs, seed_sequence
+from .shared import SharedHandle, SharedPopulation
+
+def crossover(parent1: utils.FlatCube, parent2: utils.FlatCube, N: int, rng: random.Random = random) -> utils.FlatCube:
+    child = parent1[:]
+    for cell in range(N * N * N):
+        if rng.random() < 0.5:
+            child[cell] = parent2[cell]
+    return child
+
+def order_crossover(parent1: utils.FlatCube, parent2: utils.FlatCube, N: int,
+                    rng: random.Random = random) -> utils.FlatCube:
+    """OX: keeps a slice of parent1 and fills the rest with parent2's values in their cyclic order."""
+    size = N * N * N
+    start, end = sorted(rng.sample(range(size + 1), 2))
+    segment = parent1[start:end]
+    used = set(segment)
+    fill = [value for value in parent2[end:] + parent2[:end] if value not in used]
+    return array('i', fill[size - end:]) + segment + array('i', fill[:size - end])
+
+def pmx_crossover(parent1: utils.FlatCube, parent2: utils.FlatCube, N: int,
+                  rng: random.Random = random) -> utils.FlatCube:
+    """PMX: keeps a slice of parent1 and places the displaced parent2 values through the slice mapping."""
+    size = N * N * N
+    start, end = sorted(rng.sample(range(size + 1), 2))
+    child = parent2[:]
+    child[start:end] = parent1[start:end]
+    position = {value: cell for cell, value in enumerate(parent2)}
+    segment = set(parent1[start:end])
+    for cell in range(start, end):
+        value = parent2[cell]
+        if value in segment:
+            continue
+        target = cell
+        while start <= target < end:
+            target = position[parent1[target]]
+        child[target] = value
     return child
 
-def mutate(cube: List[List[List[int]]], N: int, mutation_rate: float) -> List[List[List[int]]]:
-    mutated = deepcopy(cube)
-    for i in range(N):
-        for j in range(N):
-            for k in range(N):
-                if random.random() < mutation_rate:
-                    mutated[i][j][k] = random.randint(1, N * N * N)
+def cycle_crossover(parent1: utils.FlatCube, parent2: utils.FlatCube, N: int,
+                    rng: random.Random = random) -> utils.FlatCube:
+    """CX: copies whole position cycles, alternating between parent1 and parent2."""
+    size = N * N * N
+    child = parent1[:]
+    position = {value: cell for cell, value in enumerate(parent1)}
+    visited = [False] * size
+    from_parent1 = True
+    for start in range(size):
+        if visited[start]:
+            continue
+        cell = start
+        while not visited[cell]:
+            visited[cell] = True
+            if not from_parent1:
+                child[cell] = parent2[cell]
+            cell = position[parent2[cell]]
+        from_parent1 = not from_parent1
+    return child
+
+def mutate(cube: utils.FlatCube, N: int, mutation_rate: float, rng: random.Random = random,
+           np_rng: np.random.Generator | None = None) -> utils.FlatCube:
+    mutated = cube[:]
+    for cell in range(N * N * N):
+        if rng.random() < mutation_rate:
+            mutated[cell] = rng.randint(1, N * N * N)
     return mutated
 
-def evaluate_population(population: List[List[List[int]]]) -> List[float]:
-    return [utils.objective_function(individual) for individual in population]
+def swap_mutation_pairs(N: int, mutation_rate: float, rng: random.Random = random,
+                        np_rng: np.random.Generator | None = None) -> List[Tuple[int, int]]:
+    """Draws the swaps of a swap mutation: each cell is swapped with another one with probability mutation_rate."""
+    size = N * N * N
+    count = int((np_rng or np.random).binomial(size, mutation_rate))
+    if count == 0:
+        return []
+    pairs = []
+    for cell in rng.sample(range(size), count):
+        other = rng.randrange(size - 1)
+        pairs.append((cell, other if other < cell else other + 1))
+    return pairs
+
+def swap_mutate(cube: utils.FlatCube, N: int, mutation_rate: float, rng: random.Random = random,
+                np_rng: np.random.Generator | None = None) -> utils.FlatCube:
+    mutated = cube[:]
+    for a, b in swap_mutation_pairs(N, mutation_rate, rng, np_rng):
+        mutated[a], mutated[b] = mutated[b], mutated[a]
+    return mutated
 
-def tournament_selection(population: List[List[List[int]]], costs: List[float], tournament_size: int) -> List[List[List[int]]]:
-    selected = []
-    for _ in range(len(population)):
-        tournament = random.sample(list(zip(population, costs)), k=tournament_size)
-        winner = min(tournament, key=lambda x: x[1])
-        selected.append(deepcopy(winner[0]))
-    return selected
+CROSSOVER_OPERATORS = {
+    "uniform": crossover,
+    "order": order_crossover,
+    "pmx": pmx_crossover,
+    "cycle": cycle_crossover,
+}
 
-def genetic_algorithm(cube: List[List[List[int]]], crossover_rate: float = 0.8, initial_mutation_rate: float = 0.05, elitism_count: int = 5, tournament_size: int = 5) -> Dict:
-    N = len(cube)
-    population_size = 300 
-    max_iteration = 500
-    population = [utils.initialize_random_cube(N) for _ in range(population_size)]
-    costs = []
-    states = []
-    best_cost = float('inf')
-    best_cube = None
-    
-    start_time = time.time()
-    
-    for iteration in range(max_iteration):
+MUTATION_OPERATORS = {
+    "swap": swap_mutate,
+    "random": mutate,
+}
+
+def evaluate_population(population: List[utils.FlatCube]) -> List[float]:
+    # Seluruh populasi dinilai sekaligus dalam satu operasi vektor
+    return get_evaluator().batch_cost(population).tolist()
+
+def score_population(population: List[utils.FlatCube], costs: List[int | None], sums: List[List[int] | None],
+                     hashes: List[int | None] | None = None) -> None:
+    """Fills in the cost and line sums of every individual not scored yet, in one batch.
+
+    Individuals already in the cost cache (e.g. a child identical to its parents in a
+    converged population) are taken from it instead of being rescored. When hashes is
+    given, the Zobrist hashes of the newly scored individuals are filled in too.
+    """
+    unknown = [index for index, cost in enumerate(costs) if cost is None]
+    if not unknown:
+        return
+    N = utils.cube_size(population[0])
+    cells = as_cell_matrix([population[index] for index in unknown])
+    batch_hashes = hasher(N).hash_batch(cells)
+    if hashes is not None:
+        for index, h in zip(unknown, batch_hashes):
+            hashes[index] = h
+
+    missing = []
+    for row, (index, h) in enumerate(zip(unknown, batch_hashes)):
+        cached = cost_cache.get(N, h, population[index].tobytes())
+        if cached is None:
+            missing.append(row)
+        else:
+            costs[index], sums[index] = cached
+    if not missing:
+        return
+
+    batch_sums = get_evaluator().batch_line_sums(cells[missing])
+    magic_number = utils.calculate_magic_number(N)
+    batch_costs = np.abs(magic_number - batch_sums).sum(axis=1).tolist()
+    for row, cost, line_sums in zip(missing, batch_costs, batch_sums.tolist()):
+        index = unknown[row]
+        costs[index] = cost
+        sums[index] = line_sums
+        cost_cache.put(N, batch_hashes[row], population[index].tobytes(), cost, line_sums)
+
+def tournament_selection(population: List[utils.FlatCube], costs: List[float], tournament_size: int,
+                         np_rng: np.random.Generator | None = None) -> List[int]:
+    """Returns the indices of the tournament winners, one per population slot."""
+    # Semua turnamen diundi sekaligus: baris = turnamen, kolom = peserta
+    randint = np_rng.integers if np_rng is not None else np.random.randint
+    entrants = randint(0, len(population), size=(len(population), tournament_size))
+    winners = np.argmin(np.asarray(costs)[entrants], axis=1)
+    return entrants[np.arange(len(population)), winners].tolist()
+
+def evolve_population(population: List[utils.FlatCube], generations: range, max_iteration: int,
+                      crossover_rate: float, initial_mutation_rate: float, elitism_count: int,
+                      tournament_size: int, crossover_operator: str = "order",
+                      mutation_operator: str = "swap",
+                      seed: Seed = None) -> Generator[Tuple[float, float, utils.FlatCube], None, List[utils.FlatCube]]:
+    """Evolves a population, yielding (average cost, best cost, best individual) for every generation.
+
+    Cost, line sums and Zobrist hash travel with each individual, so elites and
+    swap-mutated clones are rescored and rehashed incrementally and only crossover
+    children go through the batch evaluation. Scored clones enter the cost cache, where
+    identical crossover children later find them.
+    """
+    rng, np_rng = make_rngs(seed)
+    N = utils.cube_size(population[0])
+    population_size = len(population)
+    crossover_function = CROSSOVER_OPERATORS[crossover_operator]
+    zobrist = hasher(N)
+    costs: List[int | None] = [None] * population_size
+    sums: List[List[int] | None] = [None] * population_size
+    hashes: List[int | None] = [None] * population_size
+    for iteration in generations:
         # Evaluate population
-        population_costs = evaluate_population(population)
-        fitness_scores = list(zip(population_costs, population))
-        fitness_scores.sort(key=lambda x: x[0])
-        
-        current_fitness_values = [score[0] for score in fitness_scores]
-        avg_fitness = sum(current_fitness_values) / len(current_fitness_values)
+        score_population(population, costs, sums, hashes)
+        ranking = sorted(range(population_size), key=costs.__getitem__)
+        avg_fitness = sum(costs) / population_size
         
-        costs.append(avg_fitness)
-        states.append(deepcopy(fitness_scores[0][1]))
-        
-        if fitness_scores[0][0] < best_cost:
-            best_cost = fitness_scores[0][0]
-            best_cube = deepcopy(fitness_scores[0][1])
+        yield avg_fitness, costs[ranking[0]], population[ranking[0]]
         
         # Elitism: preserve top elitism_count individuals
-        elites = [deepcopy(ind) for _, ind in fitness_scores[:elitism_count]]
+        next_population = [population[index][:] for index in ranking[:elitism_count]]
+        next_costs = [costs[index] for index in ranking[:elitism_count]]
+        next_sums = [sums[index] for index in ranking[:elitism_count]]
+        next_hashes = [hashes[index] for index in ranking[:elitism_count]]
         
         # Tournament selection
-        selected_population = tournament_selection(population, population_costs, tournament_size)
+        selected = tournament_selection(population, costs, tournament_size, np_rng)
         
         # Crossover and mutation
-        next_population = []
         mutation_rate = initial_mutation_rate * (1 - iteration / max_iteration)  # Adaptive mutation rate
-        while len(next_population) < population_size - elitism_count:
-            parent1 = random.choice(selected_population)
-            parent2 = random.choice(selected_population)
-            if random.random() < crossover_rate:
-                child = crossover(parent1, parent2, N)
+        while len(next_population) < population_size:
+            parent1 = rng.choice(selected)
+            parent2 = rng.choice(selected)
+            if rng.random() < crossover_rate:
+                child = crossover_function(population[parent1], population[parent2], N, rng)
+                child_cost, child_sums, child_hash = None, None, None
             else:
-                child = deepcopy(parent1)
-            child = mutate(child, N, mutation_rate)
+                child = population[parent1][:]
+                child_cost, child_sums, child_hash = costs[parent1], sums[parent1][:], hashes[parent1]
+
+            if mutation_operator == "swap" and child_cost is not None:
+                # Klon induk: cost dan hash anak dihitung dari milik induk, tanpa evaluasi ulang
+                engine = CostEngine.from_state(child, child_sums, child_cost)
+                pairs = swap_mutation_pairs(N, mutation_rate, rng, np_rng)
+                for a, b in pairs:
+                    child_hash = zobrist.swap(child_hash, child, a, b)
+                    engine.swap(a, b)
+                child_cost = engine.cost
+                if pairs:
+                    cost_cache.put(N, child_hash, child.tobytes(), child_cost, child_sums)
+            else:
+                child = MUTATION_OPERATORS[mutation_operator](child, N, mutation_rate, rng, np_rng)
+                child_cost, child_sums, child_hash = None, None, None
             next_population.append(child)
+            next_costs.append(child_cost)
+            next_sums.append(child_sums)
+            next_hashes.append(child_hash)
         
-        # Add elites to the new population
-        population = elites + next_population
+        population, costs, sums, hashes = next_population, next_costs, next_sums, next_hashes
+    return population
+
+def evolve_island(handle: SharedHandle, rows: range, generations: range, max_iteration: int, options: Dict,
+                  seed: Seed = None) -> List[Tuple[float, float, utils.FlatCube]]:
+    """Runs one island for a migration epoch in a worker process.
+
+    The island's individuals are the given rows of the shared population; they are read
+    at the start of the epoch and written back at the end. Once the shared limits of the
+    run are exhausted the epoch ends early and the rows are left as they were.
+    """
+    limits = worker_limits()
+    with SharedPopulation.attach(handle) as shared:
+        evolution = evolve_population(shared.read(rows), generations, max_iteration, **options, seed=seed)
+        records = []
+        while True:
+            try:
+                avg_fitness, cost, best = next(evolution)
+            except StopIteration as stop:
+                shared.write(rows.start, stop.value)
+                return records
+            records.append((avg_fitness, cost, best[:]))
+            if limits is not None:
+                limits.count(len(rows))
+                limits.publish(cost)
+                if limits.exhausted():
+                    evolution.close()
+                    return records
+
+def migrate(shared: SharedPopulation, islands: int, migration_size: int) -> None:
+    """Ring migration: the best individuals of each island replace the worst of the next one."""
+    blocks = shared.cells.reshape(islands, len(shared) // islands, -1)
+    ranked = []
+    for block in blocks:
+        costs = evaluate_population(block)
+        ranked.append(block[np.argsort(costs, kind="stable")])
+    for island, block in enumerate(blocks):
+        block[:len(block) - migration_size] = ranked[island][:len(block) - migration_size]
+        block[len(block) - migration_size:] = ranked[island - 1][:migration_size]
+
+def island_genetic_stream(cube: List[List[List[int]]], options: Dict, population_size: int, max_iteration: int,
+                          islands: int, migration_interval: int, migration_size: int,
+                          workers: int | None, seed: Seed = None,
+                          budget: RunBudget | None = None) -> utils.AlgorithmStream:
+    """Island-model GA: sub-populations evolve in worker processes and exchange their best every epoch.
+
+    All islands live in one shared-memory population, so only the per-generation records
+    travel between the processes. The budget is checked between epochs and by every island.
+    """
+    N = len(cube)
+    sequence = seed_sequence(seed)
+    rng, _ = make_rngs(sequence)
+    population = [utils.flatten_cube(utils.initialize_random_cube(N, rng)) for _ in range(population_size * islands)]
+    island_rows = [range(island * population_size, (island + 1) * population_size) for island in range(islands)]
+    island_costs = [[] for _ in range(islands)]
+    best_cost = float('inf')
+    best_cube = None
+    completed = 0
+
+    start_time = time.time()
+    limits = SharedLimits(budget)
+
+    with SharedPopulation.from_population(population) as shared, \
+            parallel.worker_pool(min(islands, workers or parallel.pool_size()),
+                                 initializer=install_limits, initargs=(limits,)) as pool:
+        for epoch_start in range(0, max_iteration, migration_interval):
+            if limits.exhausted():
+                break
+            generations = range(epoch_start, min(epoch_start + migration_interval, max_iteration))
+            futures = [pool.submit(evolve_island, shared.handle, rows, generations, max_iteration, options, island_seed)
+                       for rows, island_seed in zip(island_rows, parallel.task_seeds(sequence, islands))]
+            epoch = [future.result() for future in futures]
+
+            for island, records in enumerate(epoch):
+                island_costs[island].extend(avg_fitness for avg_fitness, _, _ in records)
+
+            # Satu event per generasi: rata-rata cost semua pulau, state individu terbaik saat itu.
+            # Pulau yang berhenti karena batas run bisa punya generasi lebih sedikit
+            try:
+                for offset in range(min(len(records) for records in epoch)):
+                    generation = [records[offset] for records in epoch]
+                    avg_fitness = sum(record[0] for record in generation) / islands
+                    cost, best = min(((record[1], record[2]) for record in generation), key=lambda x: x[0])
+                    if cost < best_cost:
+                        best_cost = cost
+                        best_cube = best[:]
+                    completed = generations[offset] + 1
+                    yield utils.progress_event(completed, avg_fitness, state=best,
+                                               evaluations=population_size * islands)
+            except BudgetExhausted:
+                limits.stop()
+                break
+
+            if generations.stop < max_iteration and not limits.exhausted():
+                migrate(shared, islands, migration_size)
+
+    duration = time.time() - start_time
+
+    return parallel.run_summary({
+        "final_cube": best_cube,
+        "final_cost": best_cost,
+        "duration": round(duration, 2),
+        "iteration": completed,
+        "population": population_size * islands,
+        "island_costs": island_costs,
+    }, cube, limits, budget)
+
+def check_genetic_params(crossover_operator: str, mutation_operator: str, islands: int, migration_interval: int,
+                         migration_size: int, population_size: int) -> None:
+    """Raises ValueError for operator names or migration settings genetic_stream cannot run with."""
+    if crossover_operator not in CROSSOVER_OPERATORS:
+        raise ValueError(f"Unknown crossover operator '{crossover_operator}', choose from {sorted(CROSSOVER_OPERATORS)}")
+    if mutation_operator not in MUTATION_OPERATORS:
+        raise ValueError(f"Unknown mutation operator '{mutation_operator}', choose from {sorted(MUTATION_OPERATORS)}")
+    if islands > 1 and (not 0 < migration_size < population_size or migration_interval < 1):
+        raise ValueError("migration_size must be between 1 and the population size, migration_interval at least 1")
+
+def genetic_stream(cube: List[List[List[int]]], crossover_rate: float = 0.8, initial_mutation_rate: float = 0.05,
+                   elitism_count: int = 5, tournament_size: int = 5, islands: int = 1, migration_interval: int = 25,
+                   migration_size: int = 5, workers: int | None = None, crossover_operator: str = "order",
+                   mutation_operator: str = "swap", seed: Seed = None, population_size: int = 300,
+                   max_iteration: int = 500, budget: RunBudget | None = None) -> utils.AlgorithmStream:
+    N = len(cube)
+    options = {
+        "crossover_rate": crossover_rate,
+        "initial_mutation_rate": initial_mutation_rate,
+        "elitism_count": elitism_count,
+        "tournament_size": tournament_size,
+        "crossover_operator": crossover_operator,
+        "mutation_operator": mutation_operator,
+    }
+    check_genetic_params(crossover_operator, mutation_operator, islands, migration_interval, migration_size,
+                         population_size)
+    if islands > 1:
+        return (yield from island_genetic_stream(cube, options, population_size, max_iteration, islands,
+                                                 migration_interval, migration_size, workers, seed, budget))
+
+    sequence = seed_sequence(seed)
+    rng, _ = make_rngs(sequence)
+    population = [utils.flatten_cube(utils.initialize_random_cube(N, rng)) for _ in range(population_size)]
+    best_cost = float('inf')
+    best_cube = None
+    completed = 0
+    
+    start_time = time.time()
+    
+    evolution = evolve_population(population, range(max_iteration), max_iteration, **options,
+                                  seed=sequence.spawn(1)[0])
+    for iteration, (avg_fitness, cost, best) in enumerate(evolution):
+        if cost < best_cost:
+            best_cost = cost
+            best_cube = best[:]
+        completed = iteration + 1
+        try:
+            yield utils.progress_event(completed, avg_fitness, state=best[:], evaluations=population_size)
+        except BudgetExhausted:
+            evolution.close()
+            break
     
     duration = time.time() - start_time
     
     return {
         "final_cube": best_cube,
         "final_cost": best_cost,
-        "average_cost": round(best_cost / 109, 4),
+        "average_cost": utils.average_cost(best_cost, N),
         "duration": round(duration, 2),
-        "iteration": len(costs),
+        "iteration": completed,
         "population": population_size,
-        "costs": costs,
-        "states": states,
-    }
\ No newline at end of file
+    }
+
+def genetic_algorithm(cube: List[List[List[int]]], crossover_rate: float = 0.8, initial_mutation_rate: float = 0.05,
+                      elitism_count: int = 5, tournament_size: int = 5, islands: int = 1, migration_interval: int = 25,
+                      migration_size: int = 5, workers: int | None = None, crossover_operator: str = "order",
+                      mutation_operator: str = "swap", seed: Seed = None, population_size: int = 300,
+                      max_iteration: int = 500, budget: RunBudget | None = None) -> Dict:
+    return collect_run(genetic_stream(cube, crossover_rate, initial_mutation_rate, elitism_count, tournament_size,
+                                      islands, migration_interval, migration_size, workers, crossover_operator,
+                                      mutation_operator, seed, population_size, max_iteration, budget), cube,
+                       budget=budget)
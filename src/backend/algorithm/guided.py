@@ -0,0 +1,109 @@
+import random
+from typing import List, Tuple
+from . import metrics, utils
+from .costEngine import CostEngine
+from .neighborhood import random_neighbor
+
+class DeviationTree:
+    """Fenwick tree over non-negative per-line deviations from the magic number.
+
+    Sampling a line proportionally to its deviation and updating one line both take
+    O(log L), so the index can follow every accepted swap.
+    """
+
+    def __init__(self, deviations: List[int]):
+        self.size = len(deviations)
+        self.values = list(deviations)
+        self.tree = [0] * (self.size + 1)
+        for line, value in enumerate(deviations):
+            index = line + 1
+            self.tree[index] += value
+            parent = index + (index & -index)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[index]
+        # Bit tertinggi untuk penelusuran turun saat sampling
+        self.top = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    @property
+    def total(self) -> int:
+        return self.prefix(self.size)
+
+    def prefix(self, count: int) -> int:
+        """Sum of the deviations of the first count lines."""
+        total = 0
+        while count > 0:
+            total += self.tree[count]
+            count -= count & -count
+        return total
+
+    def set(self, line: int, value: int) -> None:
+        change = value - self.values[line]
+        if change == 0:
+            return
+        self.values[line] = value
+        index = line + 1
+        while index <= self.size:
+            self.tree[index] += change
+            index += index & -index
+
+    def find(self, target: int) -> int:
+        """Returns the line whose cumulative deviation range contains target (0 <= target < total)."""
+        position = 0
+        step = self.top
+        while step:
+            nxt = position + step
+            if nxt <= self.size and self.tree[nxt] <= target:
+                position = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        return position
+
+class GuidedProposer:
+    """Proposes swaps that move value from lines above the magic number to lines below it.
+
+    With probability guided, the first cell comes from a line whose sum is too high and
+    the second from a line whose sum is too low. Each line is sampled in proportion to
+    its deviation. The remaining proposals are uniform, as in the stochastic search.
+    Call update() after every applied swap to keep both indexes current.
+    """
+
+    def __init__(self, engine: CostEngine, guided: float = 0.5, rng: random.Random = random):
+        if not 0.0 <= guided <= 1.0:
+            raise ValueError("guided must be between 0 and 1")
+        self.engine = engine
+        self.guided = guided
+        self.rng = rng
+        self.lines = utils.line_table(engine.N)
+        self.cell_lines = utils.cell_line_table(engine.N)
+        self.size = engine.N ** 3
+        magic_number = engine.magic_number
+        self.over = DeviationTree([max(line_sum - magic_number, 0) for line_sum in engine.sums])
+        self.under = DeviationTree([max(magic_number - line_sum, 0) for line_sum in engine.sums])
+
+    def _sample_cell(self, tree: DeviationTree) -> int:
+        line = tree.find(self.rng.randrange(tree.total))
+        return self.rng.choice(self.lines[line])
+
+    @metrics.instrument("neighbors", "neighbors_generated")
+    def guided_neighbor(self) -> Tuple[int, int]:
+        """Draws one cell from an over-full line and one from an under-full line."""
+        a = self._sample_cell(self.over)
+        b = self._sample_cell(self.under)
+        while b == a:
+            b = self.rng.randrange(self.size)
+        return a, b
+
+    def propose(self) -> Tuple[int, int]:
+        """Returns two distinct flat cell indices to swap."""
+        # Tanpa garis di atas dan di bawah magic number tidak ada pasangan terpandu
+        if self.over.total == 0 or self.under.total == 0 or self.rng.random() >= self.guided:
+            return random_neighbor(self.engine.N, self.rng)
+        return self.guided_neighbor()
+
+    def update(self, a: int, b: int) -> None:
+        """Refreshes the deviations of the lines through a and b after they were swapped."""
+        magic_number = self.engine.magic_number
+        sums = self.engine.sums
+        for line in self.cell_lines[a] + self.cell_lines[b]:
+            self.over.set(line, max(sums[line] - magic_number, 0))
+            self.under.set(line, max(magic_number - sums[line], 0))
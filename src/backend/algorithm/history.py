@@ -0,0 +1,122 @@
+from array import array
+from bisect import bisect_right
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+from . import metrics, utils
+from .budget import RunBudget, limit_stream
+
+# Penanda langkah pada log swap
+NO_CHANGE = -1  # state sama dengan langkah sebelumnya
+FULL_STATE = -2  # state disimpan utuh (misalnya restart atau individu terbaik GA)
+
+class StateHistory:
+    """Stores a run as its initial cube plus one swap per step, with periodic keyframes.
+
+    Memory grows by two ints per step instead of a full cube copy; state t is rebuilt
+    from the nearest keyframe at or before t.
+    """
+
+    def __init__(self, initial: Union[List[List[List[int]]], utils.FlatCube], keyframe_interval: int = 500):
+        self.initial = utils.as_flat_cube(initial)[:]
+        self.keyframe_interval = keyframe_interval
+        self.swaps = array('i')
+        self.full_states: Dict[int, utils.FlatCube] = {}
+        self.keyframe_steps: List[int] = []
+        self.keyframes: List[utils.FlatCube] = []
+        self.current = self.initial[:]
+
+    def __len__(self) -> int:
+        return len(self.swaps) // 2
+
+    @metrics.instrument("snapshot")
+    def record(self, swap: Tuple[int, int] | None = None, state: utils.FlatCube | None = None) -> None:
+        """Appends the next step: a swap of two flat indices, a full state, or no change."""
+        step = len(self)
+        if state is not None:
+            self.current = state[:]
+            self.full_states[step] = self.current[:]
+            self.swaps.extend((FULL_STATE, FULL_STATE))
+        elif swap is not None:
+            a, b = swap
+            self.current[a], self.current[b] = self.current[b], self.current[a]
+            self.swaps.extend((a, b))
+        else:
+            self.swaps.extend((NO_CHANGE, NO_CHANGE))
+
+        if step in self.full_states or step % self.keyframe_interval == 0:
+            self.keyframe_steps.append(step)
+            self.keyframes.append(self.full_states.get(step, self.current[:]))
+
+    def state_at(self, step: int) -> utils.FlatCube:
+        """Reconstructs the state after the given step."""
+        if step < 0:
+            step += len(self)
+        if not 0 <= step < len(self):
+            raise IndexError("history step out of range")
+        position = bisect_right(self.keyframe_steps, step) - 1
+        cells = self.keyframes[position][:]
+        for t in range(self.keyframe_steps[position] + 1, step + 1):
+            self._apply(cells, t)
+        return cells
+
+    def states(self) -> Iterator[utils.FlatCube]:
+        """Iterates over every state of the run in order."""
+        cells = self.initial[:]
+        for t in range(len(self)):
+            self._apply(cells, t)
+            yield cells[:]
+
+    def _apply(self, cells: utils.FlatCube, step: int) -> None:
+        a, b = self.swaps[2 * step], self.swaps[2 * step + 1]
+        if a == FULL_STATE:
+            cells[:] = self.full_states[step]
+        elif a != NO_CHANGE:
+            cells[a], cells[b] = cells[b], cells[a]
+
+    def to_dict(self) -> Dict:
+        """Returns the compact JSON form: initial cube, flat swap log and the full states by step."""
+        return {
+            "initial": utils.unflatten_cube(self.initial),
+            "swaps": self.swaps.tolist(),
+            "full_states": {str(step): utils.unflatten_cube(state) for step, state in self.full_states.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, keyframe_interval: int = 500) -> "StateHistory":
+        """Rebuilds a history from its to_dict form."""
+        history = cls(data["initial"], keyframe_interval)
+        full_states = data.get("full_states", {})
+        swaps = data["swaps"]
+        for step in range(len(swaps) // 2):
+            a, b = swaps[2 * step], swaps[2 * step + 1]
+            if a == FULL_STATE:
+                history.record(state=utils.flatten_cube(full_states[str(step)]))
+            elif a == NO_CHANGE:
+                history.record()
+            else:
+                history.record((a, b))
+        return history
+
+def collect_run(stream: utils.AlgorithmStream, cube: Union[List[List[List[int]]], utils.FlatCube],
+                on_event: Callable[[Dict], None] | None = None, budget: RunBudget | None = None) -> Dict:
+    """Runs an algorithm stream to completion and gathers its costs and state history.
+
+    on_event is called with every progress event, e.g. to report progress or to abort
+    the run by raising. With a budget the run stops early once it is used up (see limit_stream).
+    """
+    if budget is not None and not budget.unlimited:
+        stream = limit_stream(stream, cube, budget)
+    costs = []
+    history = StateHistory(cube)
+    while True:
+        try:
+            event = next(stream)
+        except StopIteration as stop:
+            result = stop.value
+            break
+        costs.append(event["cost"])
+        history.record(event["swap"], event["state"])
+        if on_event is not None:
+            on_event(event)
+    result["costs"] = costs
+    result["history"] = history
+    return result
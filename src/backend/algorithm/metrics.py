@@ -0,0 +1,143 @@
+import io
+import time
+import pstats
+import cProfile
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator
+
+# Banyak baris pstats yang disertakan pada dump profil
+PROFILE_LINES = 30
+# Counter yang dijumlahkan sebagai evaluasi kandidat; worker_evaluations datang dari worker pool bersarang
+EVALUATION_COUNTERS = ("objective_evaluations", "delta_evaluations", "worker_evaluations")
+
+# Metrik run yang sedang berjalan di proses ini; None berarti instrumentasi mati
+_active = None
+
+class RunMetrics:
+    """Counters and per-phase timers of one run."""
+
+    def __init__(self):
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.timers: Dict[str, float] = defaultdict(float)
+        self.profile: str | None = None
+
+    @property
+    def evaluations(self) -> int:
+        return sum(self.counters.get(counter, 0) for counter in EVALUATION_COUNTERS)
+
+    def to_dict(self) -> Dict:
+        total = self.timers.get("total", 0.0)
+        evaluations = self.evaluations
+        return {
+            "counters": dict(self.counters),
+            "timers": {name: round(seconds, 6) for name, seconds in self.timers.items()},
+            "evaluations_per_second": round(evaluations / total, 2) if total > 0 else None,
+            "profile": self.profile,
+        }
+
+@contextmanager
+def collect(profile: bool = False) -> Iterator[RunMetrics]:
+    """Turns instrumentation on for the code run inside the block, optionally under cProfile.
+
+    Only this process is timed; work done in a nested worker pool (islands, restarts,
+    tempering chains) is only counted, as worker_evaluations once the run ends.
+    """
+    global _active
+    run_metrics = RunMetrics()
+    previous, _active = _active, run_metrics
+    profiler = cProfile.Profile() if profile else None
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield run_metrics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            run_metrics.profile = stream.getvalue()
+        run_metrics.timers["total"] += time.perf_counter() - start
+        _active = previous
+
+def count(counter: str, amount: int) -> None:
+    """Adds amount to a counter of the active run, when instrumentation is on."""
+    if _active is not None:
+        _active.counters[counter] += amount
+
+@contextmanager
+def timer(name: str, run_metrics: RunMetrics | None = None) -> Iterator[None]:
+    """Adds the time spent in the block to a phase timer of the active (or given) run."""
+    run_metrics = run_metrics or _active
+    if run_metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run_metrics.timers[name] += time.perf_counter() - start
+
+def instrument(phase: str, counter: str | None = None, size: Callable[..., int] | None = None) -> Callable:
+    """Decorates a hot-path function to time it under phase and count its calls, when instrumentation is on.
+
+    size maps the call arguments to the number of evaluations it does (default 1).
+    With instrumentation off the only cost is one extra call.
+    """
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            run_metrics = _active
+            if run_metrics is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                run_metrics.timers[phase] += time.perf_counter() - start
+                if counter is not None:
+                    run_metrics.counters[counter] += size(*args, **kwargs) if size else 1
+        return wrapper
+    return decorator
+
+class MetricsRegistry:
+    """Totals over finished runs per algorithm, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs: Dict[str, int] = defaultdict(int)
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[tuple, int] = defaultdict(int)
+        self.timers: Dict[tuple, float] = defaultdict(float)
+
+    def observe(self, algorithm: str, result: Dict) -> None:
+        """Adds a finished run; its counters and timers are included when it ran instrumented."""
+        with self._lock:
+            self.runs[algorithm] += 1
+            self.seconds[algorithm] += result.get("duration") or 0.0
+            run_metrics = result.get("metrics") or {}
+            for name, value in run_metrics.get("counters", {}).items():
+                self.counters[(algorithm, name)] += value
+            for name, seconds in run_metrics.get("timers", {}).items():
+                self.timers[(algorithm, name)] += seconds
+
+    def render(self, gauges: Dict[str, float] | None = None) -> str:
+        """Returns every metric in the Prometheus text exposition format, plus the given gauges."""
+        with self._lock:
+            lines = ["# TYPE magic_cube_runs_total counter"]
+            lines += [f'magic_cube_runs_total{{algorithm="{algorithm}"}} {count}' for algorithm, count in sorted(self.runs.items())]
+            lines.append("# TYPE magic_cube_run_seconds_total counter")
+            lines += [f'magic_cube_run_seconds_total{{algorithm="{algorithm}"}} {round(seconds, 6)}' for algorithm, seconds in sorted(self.seconds.items())]
+            lines.append("# TYPE magic_cube_events_total counter")
+            lines += [f'magic_cube_events_total{{algorithm="{algorithm}",event="{name}"}} {value}'
+                      for (algorithm, name), value in sorted(self.counters.items())]
+            lines.append("# TYPE magic_cube_phase_seconds_total counter")
+            lines += [f'magic_cube_phase_seconds_total{{algorithm="{algorithm}",phase="{name}"}} {round(seconds, 6)}'
+                      for (algorithm, name), seconds in sorted(self.timers.items())]
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
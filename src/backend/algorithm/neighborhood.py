@@ -0,0 +1,103 @@
+import random
+from typing import Iterator, Tuple
+import numpy as np
+from . import metrics
+
+# Jumlah putaran Feistel; empat putaran sudah cukup mengacak urutan untuk keperluan pencarian
+FEISTEL_ROUNDS = 4
+MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+@metrics.instrument("neighbors", "neighbors_generated")
+def random_neighbor(N: int, rng: random.Random = random) -> Tuple[int, int]:
+    """Picks two distinct flat cell indices to swap."""
+    # Generate single integer indices instead of tuples
+    pos1 = rng.randint(0, N*N*N-1)
+    pos2 = rng.randint(0, N*N*N-1)
+    
+    # Ensure different positions
+    while pos1 == pos2:
+        pos2 = rng.randint(0, N*N*N-1)
+    return pos1, pos2
+
+# Pasangan (a, b) dengan a < b diberi indeks urut baris demi baris: (0, 1), (0, 2), ..., (1, 2), ...
+# sehingga tetangga bisa di-decode dari indeksnya tanpa menyimpan daftar seluruh pasangan
+
+def pair_count(N: int) -> int:
+    """Number of unordered pairs of distinct cells, i.e. the size of the swap neighborhood."""
+    cells = N * N * N
+    return cells * (cells - 1) // 2
+
+def pair_index(a, b, N: int):
+    """Returns the index of the pair {a, b}; works elementwise on arrays."""
+    cells = N * N * N
+    low, high = np.minimum(a, b), np.maximum(a, b)
+    return low * (2 * cells - low - 1) // 2 + high - low - 1
+
+@metrics.instrument("neighbors")
+def pairs_at(indices, N: int) -> np.ndarray:
+    """Decodes pair indices into a (k, 2) array of flat cell indices."""
+    cells = N * N * N
+    index = np.asarray(indices, dtype=np.int64).reshape(-1)
+    # Baris a adalah akar persamaan kuadrat dari posisi awal baris; dikoreksi satu langkah bila float meleset
+    a = ((2 * cells - 1 - np.sqrt((2 * cells - 1) ** 2 - 8 * index.astype(np.float64))) // 2).astype(np.int64)
+    a -= a * (2 * cells - a - 1) // 2 > index
+    a += (a + 1) * (2 * cells - a - 2) // 2 <= index
+    b = index - a * (2 * cells - a - 1) // 2 + a + 1
+    return np.stack([a, b], axis=1)
+
+class FeistelPermutation:
+    """A random bijection of [0, size) computed position by position, without storing it.
+
+    A balanced Feistel network permutes [0, 2^2h) for the smallest 2^2h >= size; values
+    that land outside [0, size) are fed through again (cycle walking) until they fall in.
+    """
+
+    def __init__(self, size: int, rounds: int = FEISTEL_ROUNDS, rng: random.Random = random):
+        self.size = size
+        self.half = max(1, (max(size - 1, 1).bit_length() + 1) // 2)
+        self.mask = np.uint64((1 << self.half) - 1)
+        self.keys = [np.uint64(rng.getrandbits(64)) for _ in range(rounds)]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _round_trip(self, values: np.ndarray) -> np.ndarray:
+        half = np.uint64(self.half)
+        left, right = values >> half, values & self.mask
+        for key in self.keys:
+            mixed = (right ^ key) * MULTIPLIER
+            mixed ^= mixed >> np.uint64(29)
+            left, right = right, left ^ ((mixed >> np.uint64(64 - self.half)) & self.mask)
+        return (left << half) | right
+
+    def __getitem__(self, positions) -> np.ndarray:
+        """Returns the permuted values at the given positions (an array or a slice)."""
+        if isinstance(positions, slice):
+            positions = np.arange(*positions.indices(self.size))
+        values = self._round_trip(np.asarray(positions, dtype=np.uint64))
+        outside = values >= self.size
+        while outside.any():
+            values[outside] = self._round_trip(values[outside])
+            outside = values >= self.size
+        return values.astype(np.int64)
+
+class PairOrder:
+    """The swap neighborhood of an N x N x N cube in a fresh random order, decoded chunk by chunk.
+
+    Memory does not depend on N: only the requested chunk is ever materialized.
+    """
+
+    def __init__(self, N: int, rng: random.Random = random):
+        self.N = N
+        self.permutation = FeistelPermutation(pair_count(N), rng=rng)
+
+    def __len__(self) -> int:
+        return len(self.permutation)
+
+    def pairs(self, start: int, stop: int) -> np.ndarray:
+        """Returns positions start..stop of the order as a (k, 2) array of flat cell indices."""
+        return pairs_at(self.permutation[start:stop], self.N)
+
+    def chunks(self, chunk_size: int) -> Iterator[np.ndarray]:
+        for start in range(0, len(self), chunk_size):
+            yield self.pairs(start, start + chunk_size)
@@ -0,0 +1,79 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Sequence, Union
+import numpy as np
+from . import metrics, utils
+from .budget import RunBudget, SharedLimits
+from .evaluators import get_evaluator
+from .seeding import Seed, seed_sequence
+
+def _seed_worker(initializer: Callable | None, initargs: tuple) -> None:
+    """Reseeds the RNGs of a freshly started worker so forked workers do not share a stream."""
+    random.seed()
+    np.random.seed()
+    if initializer is not None:
+        initializer(*initargs)
+
+def pool_size(workers: int | None = None) -> int:
+    """Returns the number of worker processes to start, never more than the cores."""
+    cores = os.cpu_count() or 1
+    return max(1, min(workers or cores, cores))
+
+def worker_pool(workers: int | None = None, initializer: Callable | None = None,
+                initargs: tuple = ()) -> ProcessPoolExecutor:
+    """Creates a process pool for parallel search, sized to the cores and capped at them.
+
+    initializer runs once in every worker, e.g. to install shared-memory values that
+    cannot be passed as task arguments.
+    """
+    return ProcessPoolExecutor(max_workers=pool_size(workers), initializer=_seed_worker,
+                               initargs=(initializer, initargs))
+
+def task_seeds(seed: Seed, count: int) -> List[np.random.SeedSequence]:
+    """Returns the seeds of the next count tasks of a parallel run.
+
+    Every task (a restart, a chain's segment, an island's epoch) gets its own random stream
+    spawned from the run seed, so a seeded run gives the same result whichever worker runs
+    it. Passing the run's SeedSequence again spawns the next, distinct streams.
+    """
+    return seed_sequence(seed).spawn(count)
+
+def run_summary(result: Dict, cube: Union[List[List[List[int]]], utils.FlatCube], limits: SharedLimits,
+                budget: RunBudget | None) -> Dict:
+    """Completes the summary of a parallel run.
+
+    When the workers stopped before reporting any state, e.g. on a budget that ran out at
+    once, the input cube is the result. The evaluations counted by the workers go to the
+    run's metrics; with a budget they and the limit the workers hit are also reported the
+    way limit_stream reports them.
+    """
+    metrics.count("worker_evaluations", limits.evaluations.value)
+    if result["final_cube"] is None:
+        result["final_cube"] = utils.as_flat_cube(cube)[:]
+        result["final_cost"] = get_evaluator().cost(result["final_cube"])
+    result["average_cost"] = utils.average_cost(result["final_cost"], utils.cube_size(result["final_cube"]))
+    if budget is not None:
+        result.update(limits.summary())
+    return result
+
+def warm_worker(sizes: Sequence[int]) -> None:
+    """Builds the line tables of every cube size and runs the evaluator once on each, e.g. to compile it."""
+    for N in sizes:
+        utils.line_table(N)
+        utils.cell_line_table(N)
+        cells = utils.flatten_cube(utils.initialize_random_cube(N))
+        get_evaluator().line_sums(cells, N)
+        get_evaluator().batch_line_sums([cells])
+
+def warm_pool(workers: int | None = None, sizes: Sequence[int] = ()) -> ProcessPoolExecutor:
+    """Creates a worker pool and starts all its workers now, each with the tables of sizes loaded.
+
+    Later tasks then pay neither the fork nor the table setup.
+    """
+    workers = pool_size(workers)
+    pool = worker_pool(workers, initializer=warm_worker, initargs=(tuple(sizes),))
+    # Satu task per worker memaksa semua worker dibuat sekarang, juga pada start method selain fork
+    for future in [pool.submit(int) for _ in range(workers)]:
+        future.result()
+    return pool
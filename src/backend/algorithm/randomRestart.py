@@ -1,98 +1,156 @@
-import copy
 import time
-import random
-from typing import List, Tuple
-from . import utils
-
-def swap_elements(cube: List[List[List[int]]], pos1: Tuple[int, int, int], pos2: Tuple[int, int, int]) -> None:
-    #menukar elemen 
-    i, j, k = pos1
-    l, m, n = pos2
-    cube[i][j][k], cube[l][m][n] = cube[l][m][n], cube[i][j][k]
-
-def generate_random_neighbor(cube: List[List[List[int]]]) -> List[List[List[int]]]:
-    #menghasilkan anak secara acak dengan menukar 2 elemen
-    N = len(cube)
-    i1, j1, k1 = random.randint(0, N-1), random.randint(0, N-1), random.randint(0, N-1)
-    i2, j2, k2 = random.randint(0, N-1), random.randint(0, N-1), random.randint(0, N-1)
-    
-    #untuk memastikan pertukarannya gasama
-    while (i1, j1, k1) == (i2, j2, k2):
-        i2, j2, k2 = random.randint(0, N-1), random.randint(0, N-1), random.randint(0, N-1)
-    
-    # Salin kubus untuk tetangga baru
-    new_cube = [[[cube[i][j][k] for k in range(N)] for j in range(N)] for i in range(N)]
-    
-    # tukar elemen
-    swap_elements(new_cube, (i1, j1, k1), (i2, j2, k2))
-    
-    return new_cube
-
-def random_restart_algorithm(cube: List[List[List[int]]], max_restart: int = 10, max_iterations: int = 100) -> dict:
+from array import array
+from typing import Dict, List
+from . import parallel, utils
+from .budget import BudgetExhausted, RunBudget, SharedLimits, install_limits, worker_limits
+from .costEngine import CostEngine
+from .guided import GuidedProposer
+from .history import NO_CHANGE, collect_run
+from .seeding import Seed, make_rngs
+from .neighborhood import random_neighbor
+
+# Worker memeriksa incumbent bersama dan batas run setiap sekian probe
+CHECK_INTERVAL = 256
+
+def climb(N: int, max_iterations: int, max_stall: int, seed: Seed = None, guided: float = 0.0) -> Dict:
+    """One restart: a stochastic hill climb from a fresh random cube, run in a worker process.
+
+    The climb stops after max_iterations probes, after max_stall probes in a row without
+    improvement, or as soon as the shared limits of the run (target cost reached by any
+    worker, deadline, evaluation cap) are exhausted.
+    """
+    limits = worker_limits()
+    rng, _ = make_rngs(seed)
+    engine = CostEngine(utils.initialize_random_cube(N, rng))
+    proposer = GuidedProposer(engine, guided, rng) if guided else None
+    initial = engine.snapshot()
+    costs = []
+    swaps = array('i')
+    stall = 0
+    counted = 0
+
+    for iteration in range(max_iterations):
+        if iteration % CHECK_INTERVAL == 0 and limits is not None:
+            limits.count(iteration - counted)
+            counted = iteration
+            limits.publish(engine.cost)
+            if limits.exhausted():
+                break
+
+        # melakukan Generate random neighbor, sama dengan stochastic
+        pos1, pos2 = proposer.propose() if proposer else random_neighbor(N, rng)
+        delta = engine.swap_delta(pos1, pos2)
+        if delta < 0:
+            engine.swap(pos1, pos2, delta)
+            if proposer:
+                proposer.update(pos1, pos2)
+            swaps.extend((pos1, pos2))
+            stall = 0
+        else:
+            swaps.extend((NO_CHANGE, NO_CHANGE))
+            stall += 1
+        costs.append(engine.cost)
+
+        if stall >= max_stall:
+            break
+
+    if limits is not None:
+        limits.count(len(costs) - counted)
+        limits.publish(engine.cost)
+    return {"initial": initial, "costs": costs, "swaps": swaps, "final_cube": engine.snapshot(), "cost": engine.cost}
+
+def random_restart_stream(cube: List[List[List[int]]], max_restart: int = 10, max_iterations: int = 2000,
+                          max_stall: int = 500, workers: int | None = None, time_limit: float | None = None,
+                          target_cost: int = 0, seed: Seed = None, guided: float = 0.0,
+                          budget: RunBudget | None = None) -> utils.AlgorithmStream:
     """
     Melakukan algoritma random restart untuk meminimalkan cost kubus dengan mempertahankan variabel asli.
-    Setiap restart memiliki batas maksimal iterasi, dan best_cube dibandingkan antar-restart.
+    Restart dijalankan paralel di beberapa proses; tiap restart adalah local search stochastic penuh,
+    dan best_cube dibandingkan antar-restart. Pencarian berhenti lebih awal bila target_cost tercapai
+    atau time_limit (detik) habis. guided adalah porsi tetangga yang diambil dari garis paling menyimpang.
+    Batas dari budget (waktu, target, jumlah evaluasi) juga diperiksa langsung oleh setiap worker.
     """
     N = len(cube)
-    current_cube = utils.initialize_random_cube(N)
-    current_cost = utils.objective_function(current_cube)
-    cube = current_cube
-    best_cost = current_cost
+    best_cube = None
+    best_cost = float('inf')
     restart = 0
-    costs = []
-    states = []
+    recorded = 0
     iteration_restart = []
-    
+
     start_time = time.time()
+    limits = SharedLimits(budget, time_limit, target_cost)
 
-    while restart < max_restart:
-        iteration = 0
-        while iteration < max_iterations:
-            # melakukan Generate random neighbor
-            neighbor_cube = generate_random_neighbor(current_cube)
-            neighbor_cost = utils.objective_function(neighbor_cube)
-            
-            if neighbor_cost >= current_cost:
-                iteration += 1
-                costs.append(current_cost)
-                states.append(copy.deepcopy(current_cube))
-                # Jika biaya tetangga lebih buruk atau sama, keluar dari pencarian
-                break
-            else:
-                # Jika tetangga lebih baik, update current_cube
-                current_cube = neighbor_cube
-                current_cost = neighbor_cost
-            iteration += 1
-            costs.append(current_cost)
-            states.append(copy.deepcopy(current_cube))
-
-        # Bandingkan best_cube di setiap restart setelah restart pertama
-        if restart == 0:
-            cube = current_cube
-            best_cost = current_cost
-        else:
-            # Jika solusi restart saat ini lebih baik, update best_cube
-            if current_cost < best_cost:
-                cube = current_cube
-                best_cost = current_cost
+    with parallel.worker_pool(min(max_restart, workers or parallel.pool_size()),
+                              initializer=install_limits, initargs=(limits,)) as pool:
+        futures = [pool.submit(climb, N, max_iterations, max_stall, restart_seed, guided)
+                   for restart_seed in parallel.task_seeds(seed, max_restart)]
+
+        # Hasil diteruskan sesuai urutan restart begitu masing-masing selesai
+        remaining = iter(futures)
+        try:
+            for future in remaining:
+                if future.cancelled():
+                    continue
+                climb_result = future.result()
 
-        iteration_restart.append(iteration)
-        restart += 1
+                # Bandingkan best_cube di setiap restart
+                if climb_result["cost"] < best_cost:
+                    best_cube = climb_result["final_cube"]
+                    best_cost = climb_result["cost"]
+                iteration_restart.append(len(climb_result["costs"]))
+                restart += 1
 
-        # Restart pencarian dengan solusi acak yang baru
-        current_cube = utils.initialize_random_cube(N)
-        current_cost = utils.objective_function(current_cube)
+                # Langkah pertama tiap restart menyimpan state utuh karena kubusnya baru
+                state = climb_result["initial"][:]
+                swaps = climb_result["swaps"]
+                if not climb_result["costs"]:
+                    # Climb berhenti sebelum probe pertama: state awalnya tetap dicatat
+                    recorded += 1
+                    yield utils.progress_event(recorded, climb_result["cost"], state=state)
+                for step, cost in enumerate(climb_result["costs"]):
+                    pos1, pos2 = swaps[2 * step], swaps[2 * step + 1]
+                    swap = (pos1, pos2) if pos1 != NO_CHANGE else None
+                    recorded += 1
+                    if step == 0:
+                        if swap is not None:
+                            state[pos1], state[pos2] = state[pos2], state[pos1]
+                        yield utils.progress_event(recorded, cost, state=state)
+                    else:
+                        yield utils.progress_event(recorded, cost, swap=swap)
+
+                # Target tercapai atau batas habis: restart yang belum mulai tidak perlu dijalankan
+                if limits.exhausted():
+                    for pending in futures:
+                        pending.cancel()
+        except BudgetExhausted:
+            # Budget habis saat progres diteruskan: hentikan worker, restart yang sudah selesai tetap dibandingkan
+            limits.stop()
+            for pending in futures:
+                pending.cancel()
+            for future in remaining:
+                if future.cancelled():
+                    continue
+                climb_result = future.result()
+                if climb_result["cost"] < best_cost:
+                    best_cube = climb_result["final_cube"]
+                    best_cost = climb_result["cost"]
+                iteration_restart.append(len(climb_result["costs"]))
+                restart += 1
 
     duration = time.time() - start_time
 
-    return {                                                   
-        "final_cube": cube,
+    return parallel.run_summary({
+        "final_cube": best_cube,
         "final_cost": best_cost,
-        "average_cost": round(best_cost/109, 4),
         "duration": round(duration, 2),
-        "iteration": len(costs),
+        "iteration": recorded,
         "iteration_restart": iteration_restart,
         "restart": restart,
-        "costs": costs,
-        "states": states
-    }
\ No newline at end of file
+    }, cube, limits, budget)
+
+def random_restart_algorithm(cube: List[List[List[int]]], max_restart: int = 10, max_iterations: int = 2000,
+                             max_stall: int = 500, workers: int | None = None, time_limit: float | None = None,
+                             target_cost: int = 0, seed: Seed = None, guided: float = 0.0,
+                             budget: RunBudget | None = None) -> dict:
+    return collect_run(random_restart_stream(cube, max_restart, max_iterations, max_stall, workers, time_limit,
+                                             target_cost, seed, guided, budget), cube, budget=budget)
@@ -0,0 +1,19 @@
+import random
+from typing import Tuple
+import numpy as np
+
+# Seed sebuah run: int, SeedSequence, Generator NumPy, atau None untuk entropi baru
+Seed = int | np.random.SeedSequence | np.random.Generator | None
+
+def seed_sequence(seed: Seed = None) -> np.random.SeedSequence:
+    """Normalizes a run seed into a SeedSequence."""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if isinstance(seed, np.random.Generator):
+        return np.random.SeedSequence(seed.integers(0, 2 ** 63, size=4).tolist())
+    return np.random.SeedSequence(seed)
+
+def make_rngs(seed: Seed = None) -> Tuple[random.Random, np.random.Generator]:
+    """Returns a run's Python and NumPy generators, drawn from two independent child streams."""
+    python_seq, numpy_seq = seed_sequence(seed).spawn(2)
+    return random.Random(int(python_seq.generate_state(1, np.uint64)[0])), np.random.default_rng(numpy_seq)
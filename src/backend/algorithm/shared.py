@@ -0,0 +1,76 @@
+from array import array
+from multiprocessing import shared_memory
+from typing import Iterable, List, Tuple
+import numpy as np
+from . import utils
+
+# (nama blok, jumlah individu, N): cukup kecil untuk dikirim ke worker sebagai argumen task
+SharedHandle = Tuple[str, int, int]
+
+class SharedPopulation:
+    """Cubes of a population in one shared-memory block, one row of N³ C ints per individual.
+
+    The creating process owns the block and unlinks it on close. Worker processes attach
+    by handle and read or write rows in place, so no cube is ever pickled.
+    """
+
+    def __init__(self, block: shared_memory.SharedMemory, individuals: int, N: int, owner: bool):
+        self.block = block
+        self.individuals = individuals
+        self.N = N
+        self.owner = owner
+        # Layout baris = individu, kolom = sel flat, sama dengan array('i') dari flatten_cube
+        self.cells = np.ndarray((individuals, N ** 3), dtype=np.intc, buffer=block.buf)
+
+    @classmethod
+    def create(cls, individuals: int, N: int) -> "SharedPopulation":
+        size = individuals * N ** 3 * np.dtype(np.intc).itemsize
+        return cls(shared_memory.SharedMemory(create=True, size=max(size, 1)), individuals, N, owner=True)
+
+    @classmethod
+    def from_population(cls, population: List[utils.FlatCube]) -> "SharedPopulation":
+        shared = cls.create(len(population), utils.cube_size(population[0]))
+        shared.write(0, population)
+        return shared
+
+    @classmethod
+    def attach(cls, handle: SharedHandle) -> "SharedPopulation":
+        name, individuals, N = handle
+        return cls(shared_memory.SharedMemory(name=name), individuals, N, owner=False)
+
+    @property
+    def handle(self) -> SharedHandle:
+        return self.block.name, self.individuals, self.N
+
+    def __len__(self) -> int:
+        return self.individuals
+
+    def __getitem__(self, index: int) -> utils.FlatCube:
+        cube = array('i')
+        cube.frombytes(self.cells[index].tobytes())
+        return cube
+
+    def __setitem__(self, index: int, cube: utils.FlatCube) -> None:
+        self.cells[index] = np.frombuffer(cube, dtype=np.intc)
+
+    def read(self, rows: Iterable[int]) -> List[utils.FlatCube]:
+        """Copies the given rows out as flat cubes."""
+        return [self[row] for row in rows]
+
+    def write(self, start: int, population: List[utils.FlatCube]) -> None:
+        """Writes consecutive individuals starting at row start."""
+        for offset, cube in enumerate(population):
+            self[start + offset] = cube
+
+    def close(self) -> None:
+        # View numpy harus dilepas dulu, SharedMemory menolak ditutup selama buffer masih diekspor
+        self.cells = None
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+    def __enter__(self) -> "SharedPopulation":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -1,76 +1,66 @@
-import copy
 import time
-import random
 from typing import Tuple, List
+from .batch import SwapDeltaTable, scan_best_swap
 from . import utils
+from .budget import RunBudget
+from .costEngine import CostEngine
+from .history import collect_run
+from .seeding import Seed, make_rngs
 
-def swap_elements(cube: List[List[List[int]]], pos1: Tuple[int, int, int], pos2: Tuple[int, int, int]) -> None:
-    """Swaps elements in the cube at the given positions."""
-    i, j, k = pos1
-    l, m, n = pos2
-    cube[i][j][k], cube[l][m][n] = cube[l][m][n], cube[i][j][k]
-
-def find_best_neighbor(cube: List[List[List[int]]], N: int, all_pairs: List[Tuple[Tuple[int, int, int], Tuple[int, int, int]]], 
-                      best_cost: int, max_sideways: int, sideways: int) -> Tuple[int, Tuple[int, int, int, int, int, int]]:
+def find_best_neighbor(engine: CostEngine, table: SwapDeltaTable | None, best_cost: int, max_sideways: int,
+                       sideways: int, rng) -> Tuple[int, Tuple[int, int], int]:
     """Finds best neighbor using random pair selection."""
-    best_neighbor_cost = best_cost
-    best_swap = (-1, -1, -1, -1, -1, -1) #Default untuk swap yang invalid
+    best_swap = (-1, -1) #Default untuk swap yang invalid
     
-    # Shuffle pasangan untuk random search
-    random.shuffle(all_pairs)
+    # Tetangga terbaik diambil dari tabel delta bila ada, selain itu seluruh tetangga ditelusuri lazy;
+    # jika ada beberapa yang sama baik, dipilih acak
+    if table is not None:
+        delta, best_pair = table.best()
+        evaluations = table.take_evaluations()
+    else:
+        delta, best_pair, evaluations = scan_best_swap(engine, rng)
+    best_neighbor_cost = engine.cost + delta
     
-    for pos1, pos2 in all_pairs:
-        # Swap tiap elemen dan cek cost
-        swap_elements(cube, pos1, pos2)
-        new_cost = utils.objective_function(cube)
-        
-        # Update jika new cost lebih baik atau bisa sideways move
-        if new_cost < best_neighbor_cost or (new_cost == best_neighbor_cost and sideways < max_sideways):
-            best_neighbor_cost = new_cost
-            i, j, k = pos1
-            l, m, n = pos2
-            best_swap = (i, j, k, l, m, n)
-
-        # Membalikkan swap ke yang semula  
-        swap_elements(cube, pos1, pos2)
-        
-        # Break jika ditemukan cost yang lebih baik
-        if new_cost < best_neighbor_cost:
-            break
+    # Update jika new cost lebih baik atau bisa sideways move
+    if best_neighbor_cost < best_cost or (best_neighbor_cost == best_cost and sideways < max_sideways):
+        best_swap = best_pair
+    else:
+        best_neighbor_cost = best_cost
             
-    return best_neighbor_cost, best_swap
+    return best_neighbor_cost, best_swap, evaluations
+
+def sideways_move_stream(cube: List[List[List[int]]], max_sideways: int = 10, seed: Seed = None,
+                         table: bool = False) -> utils.AlgorithmStream:
+    """Executes a hill climbing approach that allows sideways moves and uses random selection for neighbors.
 
-def sideways_move_algorithm(cube: List[List[List[int]]], max_sideways: int = 10) -> dict:
-    """Executes a hill climbing approach that allows sideways moves and uses random selection for neighbors."""
-    N = len(cube)
-    current_cost = utils.objective_function(cube) 
-    best_cost = current_cost
-    costs = []
-    states = []
+    With table=True the deltas of every swap are kept between steps: faster per step, but O(N⁶) memory.
+    """
+    rng, np_rng = make_rngs(seed)
+    engine = CostEngine(cube)
+    N = engine.N
+    best_cost = engine.cost
     iteration = 0
     sideways = 0
 
     # Mulai timer
     start_time = time.time()
     
-    # Generate seluruh pasangan yang mungkin
-    all_positions = [(i//(N*N), (i//N)%N, i%N) for i in range(N*N*N)]
-    all_pairs = []
-    for i in range(len(all_positions)):
-        for j in range(i+1, len(all_positions)):
-            all_pairs.append((all_positions[i], all_positions[j]))
+    # Opsional: delta seluruh tetangga, diperbarui hanya untuk pasangan yang terdampak setiap swap
+    delta_table = SwapDeltaTable(engine, np_rng) if table else None
     
     while True:
         # Cari tetangga yang lebih baik
-        best_neighbor_cost, best_swap = find_best_neighbor(cube, N, all_pairs, best_cost, max_sideways, sideways)
+        best_neighbor_cost, best_swap, evaluations = find_best_neighbor(engine, delta_table, best_cost, max_sideways,
+                                                                        sideways, rng)
         
         # Stop jika tidak menemukan tetangga yang lebih baik
-        if best_swap == (-1, -1, -1, -1, -1, -1):
+        if best_swap == (-1, -1):
             break
 
         # Perform swap yang terbaik  
-        i, j, k, l, m, n = best_swap
-        swap_elements(cube, (i, j, k), (l, m, n))
+        engine.swap(*best_swap)
+        if delta_table is not None:
+            delta_table.refresh(*best_swap)
         
         # Update cost dan check sideways move
         if best_neighbor_cost < best_cost:
@@ -81,19 +71,20 @@ def sideways_move_algorithm(cube: List[List[List[int]]], max_sideways: int = 10)
             if sideways >= max_sideways:
                 break
                 
-        costs.append(best_cost)
-        states.append(copy.deepcopy(cube))
         iteration += 1
+        yield utils.progress_event(iteration, best_cost, swap=best_swap, evaluations=evaluations)
     
     # Menghitung total durasi
     duration = time.time() - start_time
     
     return {
-        "final_cube": cube,
+        "final_cube": engine.snapshot(),
         "final_cost": best_cost,
-        "average_cost": round(best_cost/109, 4),
+        "average_cost": utils.average_cost(best_cost, N),
         "duration": round(duration, 2),
-        "iteration": len(costs),
-        "costs": costs,
-        "states": states
-    }
\ No newline at end of file
+        "iteration": iteration,
+    }
+
+def sideways_move_algorithm(cube: List[List[List[int]]], max_sideways: int = 10, seed: Seed = None,
+                            table: bool = False, budget: RunBudget | None = None) -> dict:
+    return collect_run(sideways_move_stream(cube, max_sideways, seed, table), cube, budget=budget)
\ No newline at end of file
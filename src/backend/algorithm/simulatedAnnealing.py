@@ -1,69 +1,265 @@
-import copy
 import time
 import math
 import random
-from typing import List, Tuple
-from . import utils
+from array import array
+from typing import Dict, List, Tuple
+from . import metrics, parallel, utils
+from .budget import BudgetExhausted, RunBudget, SharedLimits, install_limits, worker_limits
+from .costEngine import CostEngine
+from .guided import GuidedProposer
+from .history import NO_CHANGE, collect_run
+from .seeding import Seed, make_rngs, seed_sequence
+from .neighborhood import random_neighbor
 
-def swap_elements(cube: List[List[List[int]]], pos1: Tuple[int, int, int], pos2: Tuple[int, int, int]) -> None:
-    """Swaps elements in the cube at the given positions."""
-    i1, j1, k1 = pos1
-    i2, j2, k2 = pos2
-    cube[i1][j1][k1], cube[i2][j2][k2] = cube[i2][j2][k2], cube[i1][j1][k1]
+# Probabilitas penerimaan dicatat setiap sekian iterasi
+EXP_INTERVAL = 200
+# Replika memeriksa batas run bersama setiap sekian langkah
+CHECK_INTERVAL = 256
 
-def get_random_neighbor(N: int) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
+@metrics.instrument("neighbors", "neighbors_generated")
+def get_random_neighbor(N: int, rng: random.Random = random) -> Tuple[Tuple[int, int, int], Tuple[int, int, int]]:
     """Generates two distinct random positions in the cube."""
-    pos1 = (random.randint(0, N-1), random.randint(0, N-1), random.randint(0, N-1))
-    pos2 = (random.randint(0, N-1), random.randint(0, N-1), random.randint(0, N-1))
+    pos1 = (rng.randint(0, N-1), rng.randint(0, N-1), rng.randint(0, N-1))
+    pos2 = (rng.randint(0, N-1), rng.randint(0, N-1), rng.randint(0, N-1))
     # Ensure the positions are not the same
     while pos1 == pos2:
-        pos2 = (random.randint(0, N-1), random.randint(0, N-1), random.randint(0, N-1))
+        pos2 = (rng.randint(0, N-1), rng.randint(0, N-1), rng.randint(0, N-1))
     return pos1, pos2
 
-def acceptance_function(delta_cost: float, temperature: float) -> bool:
+def acceptance_function(delta_cost: float, temperature: float, rng: random.Random = random) -> bool:
     """Determines if a worse solution should be accepted based on probability."""
     if delta_cost > 0:
         return True # Accept if the new solution is better
     else:
-        r = random.random()
+        r = rng.random()
         # Accept with a probability based on temperature
         return r < math.exp(delta_cost / temperature)
 
-def initialize_random_cube(N: int) -> List[List[List[int]]]:
-    """Generates an N x N x N cube with random integers between 1 and 100."""
-    return [[[random.randint(1, 100) for _ in range(N)] for _ in range(N)] for _ in range(N)]
+def temperature_ladder(T_max: float, T_min: float, chains: int) -> List[float]:
+    """Returns chains temperatures spaced geometrically from T_min (coldest, first) to T_max."""
+    if chains == 1:
+        return [T_min]
+    ratio = (T_max / T_min) ** (1 / (chains - 1))
+    return [T_min * ratio ** chain for chain in range(chains)]
 
-def simulated_annealing_algorithm(cube: List[List[List[int]]], T_max: float = 100.0, T_min: float = 0.1, 
-                                E_threshold: float = 0.01, cooling_rate: float = 0.9993,
-                                max_no_improvement: int = 1000, max_iteration: int = 10000):
-    """Performs the simulated annealing algorithm to optimize the cube configuration."""
-    current_cost = utils.objective_function(cube) # Initial cost
+def anneal_segment(cells: utils.FlatCube, temperature: float, steps: int, offset: int, seed: Seed = None,
+                   guided: float = 0.0) -> Dict:
+    """Runs one replica for a number of Metropolis steps at a fixed temperature, in a worker process.
+
+    The segment ends early once the shared limits of the run are exhausted.
+    """
+    limits = worker_limits()
+    rng, _ = make_rngs(seed)
+    engine = CostEngine(cells)
+    proposer = GuidedProposer(engine, guided, rng) if guided else None
+    best_cost = engine.cost
+    best_cube = engine.snapshot()
+    costs = []
+    swaps = array('i')
+    accepted = 0
+    local_optima = 0
+    exps = []
+    counted = 0
+
+    for step in range(steps):
+        if step % CHECK_INTERVAL == 0 and limits is not None:
+            limits.count(step - counted)
+            counted = step
+            limits.publish(best_cost)
+            if limits.exhausted():
+                break
+        a, b = proposer.propose() if proposer else random_neighbor(engine.N, rng)
+        change = engine.swap_delta(a, b)
+        delta_cost = -change
+        if acceptance_function(delta_cost, temperature, rng):
+            if delta_cost < 0:
+                local_optima += 1
+            engine.swap(a, b, change)
+            if proposer:
+                proposer.update(a, b)
+            swaps.extend((a, b))
+            accepted += 1
+            if engine.cost < best_cost:
+                best_cost = engine.cost
+                best_cube = engine.snapshot()
+        else:
+            swaps.extend((NO_CHANGE, NO_CHANGE))
+        costs.append(engine.cost)
+
+        if (offset + step) % EXP_INTERVAL == 0:
+            exps.append(1 if delta_cost > 0 else math.exp(delta_cost / temperature))
+
+    if limits is not None:
+        limits.count(len(costs) - counted)
+        limits.publish(best_cost)
+    return {
+        "final_cube": engine.snapshot(),
+        "cost": engine.cost,
+        "best_cube": best_cube,
+        "best_cost": best_cost,
+        "costs": costs,
+        "swaps": swaps,
+        "accepted": accepted,
+        "local_optima": local_optima,
+        "exps": exps,
+    }
+
+def replica_exchange_stream(cube: List[List[List[int]]], T_max: float, T_min: float, E_threshold: float,
+                            max_no_improvement: int, max_iteration: int, chains: int,
+                            exchange_interval: int, workers: int | None, seed: Seed = None,
+                            guided: float = 0.0, budget: RunBudget | None = None) -> utils.AlgorithmStream:
+    """
+    Parallel tempering: chains replika berjalan di proses terpisah pada tangga suhu tetap
+    dari T_min sampai T_max. Setiap exchange_interval langkah, replika pada suhu bertetangga
+    ditukar dengan kriteria Metropolis. Progres yang di-yield adalah lintasan rantai terdingin.
+    Batas budget diperiksa di antara segmen dan oleh setiap replika di dalam segmen.
+    """
+    sequence = seed_sequence(seed)
+    rng, _ = make_rngs(sequence)
+    temperatures = temperature_ladder(T_max, T_min, chains)
+    replicas = [utils.as_flat_cube(cube)[:] for _ in range(chains)]
+    energies = [CostEngine(cube).cost] * chains
+    best_cube = replicas[0][:]
+    best_cost = energies[0]
+    iteration = 0
+    no_improvement = 0
+    cold_replaced = False
+
+    chain_stats = [{"temperature": round(temperature, 4), "accepted": 0, "local_optima": 0, "exps": []}
+                   for temperature in temperatures]
+    exchange_attempts = [0] * (chains - 1)
+    exchange_accepted = [0] * (chains - 1)
+
+    start_time = time.time()
+    limits = SharedLimits(budget)
+    interrupted = False
+
+    with parallel.worker_pool(min(chains, workers or parallel.pool_size()),
+                              initializer=install_limits, initargs=(limits,)) as pool:
+        while best_cost > E_threshold and iteration < max_iteration and no_improvement < max_no_improvement \
+                and not interrupted and not limits.exhausted():
+            steps = min(exchange_interval, max_iteration - iteration)
+            futures = [pool.submit(anneal_segment, replicas[chain], temperatures[chain], steps, iteration, chain_seed,
+                                   guided)
+                       for chain, chain_seed in enumerate(parallel.task_seeds(sequence, chains))]
+            segments = [future.result() for future in futures]
+
+            # Lintasan rantai terdingin; setelah pertukaran replika langkah pertamanya menyimpan state utuh
+            cold = segments[0]
+            state = replicas[0][:]
+            try:
+                for step, cost in enumerate(cold["costs"]):
+                    pos1, pos2 = cold["swaps"][2 * step], cold["swaps"][2 * step + 1]
+                    swap = (pos1, pos2) if pos1 != NO_CHANGE else None
+                    if step == 0 and cold_replaced:
+                        if swap is not None:
+                            state[pos1], state[pos2] = state[pos2], state[pos1]
+                        yield utils.progress_event(iteration + step + 1, cost, state=state, evaluations=chains)
+                    else:
+                        yield utils.progress_event(iteration + step + 1, cost, swap=swap, evaluations=chains)
+            except BudgetExhausted:
+                # Budget habis: segmen ini masih dihitung, lalu tidak ada segmen berikutnya
+                limits.stop()
+                interrupted = True
+
+            improved = False
+            for chain, segment in enumerate(segments):
+                replicas[chain] = segment["final_cube"]
+                energies[chain] = segment["cost"]
+                stats = chain_stats[chain]
+                stats["accepted"] += segment["accepted"]
+                stats["local_optima"] += segment["local_optima"]
+                stats["exps"].extend(segment["exps"])
+                if segment["best_cost"] < best_cost:
+                    best_cost = segment["best_cost"]
+                    best_cube = segment["best_cube"]
+                    improved = True
+            # Segmen bisa berhenti lebih awal karena batas run; rantai terdingin menentukan langkahnya
+            steps = len(cold["costs"])
+            iteration += steps
+            no_improvement = 0 if improved else no_improvement + steps
+
+            # Tukar replika bertetangga, bergantian pasangan genap dan ganjil tiap ronde
+            cold_replaced = False
+            for chain in range((iteration // exchange_interval) % 2, chains - 1, 2):
+                exchange_attempts[chain] += 1
+                exponent = (energies[chain] - energies[chain + 1]) * (1 / temperatures[chain] - 1 / temperatures[chain + 1])
+                if exponent >= 0 or rng.random() < math.exp(exponent):
+                    exchange_accepted[chain] += 1
+                    replicas[chain], replicas[chain + 1] = replicas[chain + 1], replicas[chain]
+                    energies[chain], energies[chain + 1] = energies[chain + 1], energies[chain]
+                    cold_replaced = cold_replaced or chain == 0
+
+    duration = time.time() - start_time
+
+    for stats in chain_stats:
+        stats["acceptance"] = round(stats.pop("accepted") / iteration, 4) if iteration else 0
+
+    return parallel.run_summary({
+        "final_cube": best_cube,
+        "final_cost": best_cost,
+        "duration": round(duration, 2),
+        "iteration": iteration,
+        "local_optima": chain_stats[0]["local_optima"],
+        "exps": chain_stats[0]["exps"],
+        "chain_stats": chain_stats,
+        "exchange_acceptance": [round(accepted / attempts, 4) if attempts else 0
+                                for accepted, attempts in zip(exchange_accepted, exchange_attempts)],
+    }, cube, limits, budget)
+
+def simulated_annealing_stream(cube: List[List[List[int]]], T_max: float = 100.0, T_min: float = 0.1, 
+                               E_threshold: float = 0.01, cooling_rate: float = 0.9993,
+                               max_no_improvement: int = 1000, max_iteration: int = 10000,
+                               chains: int = 1, exchange_interval: int = 100,
+                               workers: int | None = None, seed: Seed = None,
+                               guided: float = 0.0, budget: RunBudget | None = None) -> utils.AlgorithmStream:
+    """Runs simulated annealing step by step, yielding the progress of every iteration.
+
+    With chains > 1 it runs in replica-exchange mode instead (see replica_exchange_stream);
+    cooling_rate is not used there since every chain keeps its temperature. guided is the
+    share of proposals drawn from the most violated lines (see GuidedProposer). The budget
+    is only needed by the replica workers; a single chain is stopped by limit_stream.
+    """
+    if chains > 1:
+        return (yield from replica_exchange_stream(cube, T_max, T_min, E_threshold, max_no_improvement,
+                                                   max_iteration, chains, exchange_interval, workers, seed,
+                                                   guided, budget))
+    rng, _ = make_rngs(seed)
+    engine = CostEngine(cube)
+    proposer = GuidedProposer(engine, guided, rng) if guided else None
+    current_cost = engine.cost # Initial cost
     best_cost = current_cost # Set current cost as the best cost
     temperature = T_max # Set the temperature with maximum temperature
     iteration = 0
     no_improvement = 0
     local_optima = 0
 
-    costs = []
     exps = []
-    states = []
 
     # Start the timer
     start_time = time.time()
 
     while temperature > T_min and current_cost > E_threshold and iteration < max_iteration:
         # Get random positions
-        pos1, pos2 = get_random_neighbor(len(cube))
-        # Swap
-        swap_elements(cube, pos1, pos2)
-        # Calculate the new cost
-        new_cost = utils.objective_function(cube)
-        delta_cost = current_cost - new_cost
+        if proposer:
+            a, b = proposer.propose()
+        else:
+            pos1, pos2 = get_random_neighbor(engine.N, rng)
+            a, b = engine.flat_index(pos1), engine.flat_index(pos2)
+        # Calculate the new cost without touching the cube
+        change = engine.swap_delta(a, b)
+        new_cost = current_cost + change
+        delta_cost = -change
 
         # Check if the new solution shoul be accepted
-        if acceptance_function(delta_cost, temperature):
+        swap = None
+        if acceptance_function(delta_cost, temperature, rng):
             if delta_cost < 0:
                 local_optima += 1 # Count if worse solution is accepted
+            engine.swap(a, b, change) # Swap
+            if proposer:
+                proposer.update(a, b)
+            swap = (a, b)
             current_cost = new_cost
             if new_cost < best_cost:
                 best_cost = new_cost
@@ -71,7 +267,6 @@ def simulated_annealing_algorithm(cube: List[List[List[int]]], T_max: float = 10
             else:
                 no_improvement += 1
         else:
-            swap_elements(cube, pos1, pos2) # Revert swap if not accepted
             no_improvement += 1
 
         # Stop if reached no improvement limit
@@ -79,11 +274,14 @@ def simulated_annealing_algorithm(cube: List[List[List[int]]], T_max: float = 10
             break
 
         temperature *= cooling_rate # Decrease the temperature
-        costs.append(current_cost)
-        states.append(copy.deepcopy(cube))
+        try:
+            yield utils.progress_event(iteration + 1, current_cost, swap=swap)
+        except BudgetExhausted:
+            iteration += 1
+            break
 
         # Record acceptance probability every 200 iteration
-        if iteration % 200 == 0:
+        if iteration % EXP_INTERVAL == 0:
             exp_delta_E_T = 1 if delta_cost > 0 else math.exp(delta_cost / temperature)
             exps.append(exp_delta_E_T)
 
@@ -93,13 +291,22 @@ def simulated_annealing_algorithm(cube: List[List[List[int]]], T_max: float = 10
     duration = time.time() - start_time
     
     return {
-        "final_cube": cube,
+        "final_cube": engine.snapshot(),
         "final_cost": best_cost,
-        "average_cost": round(best_cost/109, 4),
+        "average_cost": utils.average_cost(best_cost, engine.N),
         "duration": round(duration, 2),
-        "iteration": len(costs),
+        "iteration": iteration,
         "local_optima": local_optima,
-        "costs": costs,
         "exps": exps,
-        "states": states
-    }
\ No newline at end of file
+    }
+
+def simulated_annealing_algorithm(cube: List[List[List[int]]], T_max: float = 100.0, T_min: float = 0.1, 
+                                E_threshold: float = 0.01, cooling_rate: float = 0.9993,
+                                max_no_improvement: int = 1000, max_iteration: int = 10000,
+                                chains: int = 1, exchange_interval: int = 100, workers: int | None = None,
+                                seed: Seed = None, guided: float = 0.0, budget: RunBudget | None = None):
+    """Performs the simulated annealing algorithm to optimize the cube configuration."""
+    return collect_run(simulated_annealing_stream(cube, T_max, T_min, E_threshold, cooling_rate,
+                                                  max_no_improvement, max_iteration, chains,
+                                                  exchange_interval, workers, seed, guided, budget), cube,
+                       budget=budget)
\ No newline at end of file
@@ -1,62 +1,96 @@
 
-import copy
-import random
 import time
-from typing import List, Tuple
+import numpy as np
+from .batch import PAIR_CHUNK, SwapDeltaTable, batch_swap_cost, scan_best_swap
+from .neighborhood import PairOrder
 from . import utils
+from .budget import RunBudget
+from .costEngine import CostEngine
+from .history import collect_run
+from .seeding import Seed, make_rngs
 
-#fungsi untuk swap
-def swap(cube: List[List[List[int]]], posisi1: Tuple[int, int, int], posisi2: Tuple[int, int, int]) -> None:
-    i1, j1, k1 = posisi1
-    i2, j2, k2 = posisi2
-    cube[i1][j1][k1], cube[i2][j2][k2] = cube[i2][j2][k2], cube[i1][j1][k1]
+# Pilihan tetangga: "best" mengambil swap terbaik dari seluruh tetangga, "first" swap pertama yang lebih baik.
+# "table" sama dengan "best" tetapi menyimpan delta seluruh pasangan (memori O(N⁶)) agar tiap langkah lebih cepat
+MODES = ("best", "first", "table")
 
 # Algoritma Steepest Ascent Hill Climbing
-def steepest_ascent_algorithm(cube):
-    N = len(cube)
+def steepest_ascent_stream(cube, mode: str = "best", seed: Seed = None) -> utils.AlgorithmStream:
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode '{mode}', expected one of {', '.join(MODES)}")
+    rng, np_rng = make_rngs(seed)
     start_time = time.time()
-    current_cost = utils.objective_function(cube)
-    best_cost = current_cost
-    costs = []
-    states = []
-    
-    #membuat daftar semua pasangan
-    all_positions = [(i//(N*N), (i//N)%N, i%N) for i in range(N*N*N)]
-    all_pairs = []
-    for i in range(len(all_positions)):
-        for j in range(i+1, len(all_positions)):
-            all_pairs.append((all_positions[i], all_positions[j]))
-    
+    engine = CostEngine(cube)
+    N = engine.N
+    best_cost = engine.cost
+    iteration = 0
+
+    if mode == "best":
+        # Seluruh tetangga ditelusuri lazy per blok dalam urutan acak, memori tetap untuk semua N
+        while True:
+            delta, (pos1, pos2), scanned = scan_best_swap(engine, rng)
+            if delta >= 0:
+                break
+            best_cost = engine.swap(pos1, pos2, delta)
+            iteration += 1
+            yield utils.progress_event(iteration, best_cost, swap=(pos1, pos2), evaluations=scanned)
+        return steepest_ascent_result(engine, best_cost, iteration, start_time)
+
+    if mode == "table":
+        # Tabel delta seluruh pasangan; setelah swap hanya pasangan yang terdampak dihitung ulang
+        table = SwapDeltaTable(engine, np_rng)
+        while True:
+            delta, (pos1, pos2) = table.best()
+            # Plateau/local optimum: tidak ada swap yang menurunkan cost
+            if delta >= 0:
+                break
+            best_cost = engine.swap(pos1, pos2, delta)
+            table.refresh(pos1, pos2)
+            iteration += 1
+            yield utils.progress_event(iteration, best_cost, swap=(pos1, pos2), evaluations=table.take_evaluations())
+        return steepest_ascent_result(engine, best_cost, iteration, start_time)
+
+    scanned = 0
     while True:
         found_improvement = False
-        random.shuffle(all_pairs)
+        #urutan acak pasangan dihitung lazy, tanpa daftar pasangan maupun shuffle
+        order = PairOrder(N, rng)
         
-        for pos1, pos2 in all_pairs:
-            # coba/try swap
-            swap(cube, pos1, pos2)
-            new_cost = utils.objective_function(cube)
+        # coba/try swap per blok pasangan, cost dihitung sekaligus secara vektor.
+        # Blok dimulai kecil karena di awal pencarian perbaikan biasanya cepat ditemukan
+        start, chunk_size = 0, 64
+        while start < len(order):
+            chunk = order.pairs(start, start + chunk_size)
+            new_costs = batch_swap_cost(engine.cells, chunk, engine.sums)
+            scanned += len(chunk)
+            better = np.flatnonzero(new_costs < best_cost)
             
-            if new_cost < best_cost:
-                best_cost = new_cost
-                costs.append(best_cost)
-                states.append(copy.deepcopy(cube))
+            if len(better) > 0:
+                pos1, pos2 = chunk[better[0]]
+                best_cost = engine.swap(int(pos1), int(pos2))
+                iteration += 1
+                yield utils.progress_event(iteration, best_cost, swap=(int(pos1), int(pos2)), evaluations=scanned)
+                scanned = 0
                 found_improvement = True
                 break 
-            else:
-                swap(cube, pos1, pos2)  # mengembalikan/undo swap
+            start += chunk_size
+            chunk_size = min(chunk_size * 2, PAIR_CHUNK)
         
         #kalau tidak ada improvement dari cost nya
         if not found_improvement:
             break  
     
+    return steepest_ascent_result(engine, best_cost, iteration, start_time)
+
+def steepest_ascent_result(engine: CostEngine, best_cost: int, iteration: int, start_time: float) -> dict:
     duration = time.time() - start_time
     #return hasil
     return {
-        "final_cube": cube,
+        "final_cube": engine.snapshot(),
         "final_cost": best_cost,
-        "average_cost": round(best_cost/109, 4),
+        "average_cost": utils.average_cost(best_cost, engine.N),
         "duration": round(duration, 2),
-        "iteration": len(costs),
-        "costs": costs,
-        "states": states
-    }
\ No newline at end of file
+        "iteration": iteration,
+    }
+
+def steepest_ascent_algorithm(cube, mode: str = "best", seed: Seed = None, budget: RunBudget | None = None):
+    return collect_run(steepest_ascent_stream(cube, mode, seed), cube, budget=budget)
\ No newline at end of file
@@ -1,77 +1,53 @@
-import copy
 import time
-import random
-from typing import List, Tuple
+from typing import List
 from . import utils
-
-def select_random_position(N: int) -> int:
-    """Selects a random position in the cube."""
-    return random.randint(0, N - 1)
-
-def calculate_cost_change(cube: List[List[List[int]]], 
-                         pos1: Tuple[int, int, int], 
-                         pos2: Tuple[int, int, int]) -> int:
-    """
-    Calculates the change in cost for a single swap between two positions.
-    """
-    original_cost = utils.objective_function(cube)
-    # Perform the swap
-    i1, j1, k1 = pos1
-    i2, j2, k2 = pos2
-    cube[i1][j1][k1], cube[i2][j2][k2] = cube[i2][j2][k2], cube[i1][j1][k1]
-    # Calculate the new cost after the swap
-    new_cost = utils.objective_function(cube)
-    # Undo the swap
-    cube[i1][j1][k1], cube[i2][j2][k2] = cube[i2][j2][k2], cube[i1][j1][k1]
-    return new_cost - original_cost
-
-def stochastic_algorithm(cube: List[List[List[int]]]) -> dict:
-    N = len(cube)
-    current_cost = utils.objective_function(cube)
+from .budget import RunBudget
+from .seeding import Seed, make_rngs
+from .costEngine import CostEngine
+from .guided import GuidedProposer
+from .history import collect_run
+from .neighborhood import random_neighbor
+
+def stochastic_stream(cube: List[List[List[int]]], seed: Seed = None, guided: float = 0.0,
+                      max_iteration: int = 10000) -> utils.AlgorithmStream:
+    """Accepts only improving random swaps; guided is the share of swaps drawn from the most violated lines."""
+    rng, _ = make_rngs(seed)
+    engine = CostEngine(cube)
+    proposer = GuidedProposer(engine, guided, rng) if guided else None
+    N = engine.N
+    current_cost = engine.cost
     best_cost = current_cost
-    costs = []
-    states = []
-    max_iteration = 10000
     iteration = 0
 
     start_time = time.time()
 
     while iteration < max_iteration:
-        # Generate single integer indices instead of tuples
-        i1, j1, k1 = random.randint(0, N-1), random.randint(0, N-1), random.randint(0, N-1)
-        i2, j2, k2 = random.randint(0, N-1), random.randint(0, N-1), random.randint(0, N-1)
-        
-        # Ensure different positions
-        while (i1, j1, k1) == (i2, j2, k2):
-            i2, j2, k2 = random.randint(0, N-1), random.randint(0, N-1), random.randint(0, N-1)
+        pos1, pos2 = proposer.propose() if proposer else random_neighbor(N, rng)
 
-        # Calculate cost change directly
-        original_cost = utils.objective_function(cube)
-        
-        # Perform swap
-        cube[i1][j1][k1], cube[i2][j2][k2] = cube[i2][j2][k2], cube[i1][j1][k1]
-        new_cost = utils.objective_function(cube)
-        cost_change = new_cost - original_cost
+        # Calculate cost change directly from the affected lines
+        cost_change = engine.swap_delta(pos1, pos2)
 
+        swap = None
         if cost_change < 0:
-            current_cost = new_cost
+            current_cost = engine.swap(pos1, pos2, cost_change)
+            if proposer:
+                proposer.update(pos1, pos2)
             best_cost = min(best_cost, current_cost)
-        else:
-            # Undo swap if no improvement
-            cube[i1][j1][k1], cube[i2][j2][k2] = cube[i2][j2][k2], cube[i1][j1][k1]
+            swap = (pos1, pos2)
 
-        costs.append(current_cost)
-        states.append(copy.deepcopy(cube))
         iteration += 1
+        yield utils.progress_event(iteration, current_cost, swap=swap)
 
     duration = time.time() - start_time
     
     return {
-        "final_cube": cube,
+        "final_cube": engine.snapshot(),
         "final_cost": best_cost,
-        "average_cost": round(best_cost/109, 4),
+        "average_cost": utils.average_cost(best_cost, N),
         "duration": round(duration, 2),
-        "iteration": len(costs),
-        "costs": costs,
-        "states": states
-    }
\ No newline at end of file
+        "iteration": iteration,
+    }
+
+def stochastic_algorithm(cube: List[List[List[int]]], seed: Seed = None, guided: float = 0.0,
+                         max_iteration: int = 10000, budget: RunBudget | None = None) -> dict:
+    return collect_run(stochastic_stream(cube, seed, guided, max_iteration), cube, budget=budget)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import time
+from typing import Dict, List
+import numpy as np
+from . import utils
+from .budget import RunBudget
+from .batch import SwapDeltaTable
+from .costEngine import CostEngine
+from .history import collect_run
+from .seeding import Seed, make_rngs
+
+def tabu_mask(tabu: Dict[int, int], iteration: int, pair_count: int) -> np.ndarray:
+    """Drops expired entries from the tabu list and returns a mask of the pairs that may be swapped."""
+    for pair in [pair for pair, expiry in tabu.items() if expiry <= iteration]:
+        del tabu[pair]
+    allowed = np.ones(pair_count, dtype=bool)
+    allowed[list(tabu)] = False
+    return allowed
+
+def tabu_search_stream(cube: List[List[List[int]]], tenure: int = 50, max_iteration: int = 1000,
+                       max_no_improvement: int = 200, seed: Seed = None) -> utils.AlgorithmStream:
+    """
+    Tabu search: setiap iterasi mengambil swap terbaik yang tidak tabu, walaupun lebih buruk,
+    sehingga bisa keluar dari plateau dan local optimum. Pasangan yang baru di-swap menjadi tabu
+    selama tenure iterasi, kecuali swap tersebut menghasilkan cost terbaik baru (aspiration).
+    """
+    _, np_rng = make_rngs(seed)
+    engine = CostEngine(cube)
+    table = SwapDeltaTable(engine, np_rng)
+    best_cube = engine.snapshot()
+    best_cost = engine.cost
+    iteration = 0
+    no_improvement = 0
+
+    # Tabu list: indeks pasangan -> iterasi saat pasangan boleh di-swap lagi
+    tabu: Dict[int, int] = {}
+
+    # Mulai timer
+    start_time = time.time()
+
+    while iteration < max_iteration and no_improvement < max_no_improvement and best_cost > 0:
+        # Aspiration: swap tabu tetap boleh jika menghasilkan cost terbaik baru
+        allowed = tabu_mask(tabu, iteration, len(table.deltas))
+        allowed |= engine.cost + table.deltas < best_cost
+        if not allowed.any():
+            break
+
+        index = table.best_index(allowed)
+        pos1, pos2 = table.pair(index)
+        current_cost = engine.swap(pos1, pos2, int(table.deltas[index]))
+        table.refresh(pos1, pos2)
+        tabu[index] = iteration + tenure
+
+        if current_cost < best_cost:
+            best_cost = current_cost
+            best_cube = engine.snapshot()
+            no_improvement = 0
+        else:
+            no_improvement += 1
+
+        iteration += 1
+        yield utils.progress_event(iteration, current_cost, swap=(pos1, pos2), evaluations=table.take_evaluations())
+
+    # Menghitung total durasi
+    duration = time.time() - start_time
+
+    return {
+        "final_cube": best_cube,
+        "final_cost": best_cost,
+        "average_cost": utils.average_cost(best_cost, engine.N),
+        "duration": round(duration, 2),
+        "iteration": iteration,
+    }
+
+def tabu_search_algorithm(cube: List[List[List[int]]], tenure: int = 50, max_iteration: int = 1000,
+                          max_no_improvement: int = 200, seed: Seed = None, budget: RunBudget | None = None) -> dict:
+    return collect_run(tabu_search_stream(cube, tenure, max_iteration, max_no_improvement, seed), cube, budget=budget)
@@ -1,19 +1,39 @@
 import random
-from typing import List, Set, Tuple
-
-def initialize_random_cube(N: int) -> List[List[List[int]]]:
-    """Initializes a 3D cube with unique random integers"""
-    total_cells = N * N * N
-    used: Set[int] = set()
-    cube = [[[0 for _ in range(N)] for _ in range(N)] for _ in range(N)]
-    
-    for i, j, k in [(i,j,k) for i in range(N) for j in range(N) for k in range(N)]:
-        while (num := random.randint(1, total_cells)) in used:
-            continue
-        cube[i][j][k] = num
-        used.add(num)
-    
-    return cube
+from array import array
+from functools import lru_cache
+from typing import Dict, Generator, List, Tuple, Union
+
+# Representasi kubus yang ringkas: array('i') berisi N³ sel dengan urutan (i, j, k)
+FlatCube = array
+
+# Algoritma berjalan sebagai generator: yield event progres, return ringkasan hasil akhir
+AlgorithmStream = Generator[Dict, None, Dict]
+
+def initialize_random_cube(N: int, rng: random.Random = random) -> List[List[List[int]]]:
+    """Initializes a 3D cube with a random permutation of 1..N³"""
+    values = list(range(1, N * N * N + 1))
+    rng.shuffle(values)
+    return unflatten_cube(array('i', values))
+
+def flatten_cube(cube: List[List[List[int]]]) -> FlatCube:
+    """Converts a nested N x N x N cube into a flat cell buffer"""
+    return array('i', [value for layer in cube for row in layer for value in row])
+
+def cube_size(cells: FlatCube) -> int:
+    """Returns N for a flat cube buffer of N³ cells"""
+    N = round(len(cells) ** (1 / 3))
+    if N * N * N != len(cells):
+        raise ValueError(f"Cube with {len(cells)} cells is not N x N x N")
+    return N
+
+def unflatten_cube(cells: FlatCube) -> List[List[List[int]]]:
+    """Converts a flat cell buffer back into the nested list format used by the API"""
+    N = cube_size(cells)
+    return [[cells[(i * N + j) * N:(i * N + j + 1) * N].tolist() for j in range(N)] for i in range(N)]
+
+def as_flat_cube(cube: Union[List[List[List[int]]], FlatCube]) -> FlatCube:
+    """Returns the cube as a flat buffer, converting nested lists when needed"""
+    return cube if isinstance(cube, array) else flatten_cube(cube)
 
 def calculate_magic_number(N: int) -> int:
     """Calculates magic number for cube of size N"""
@@ -24,8 +44,8 @@ def line_sum(cube: List[List[List[int]]], indices: List[Tuple[int, int, int]]) -
     return sum(cube[i][j][k] for i, j, k in indices)
 
 def diagonal_indices(N: int, plane: str, i: int = 0) -> List[Tuple[int, int, int]]:
-    """Returns indices for different types of diagonals"""
-    if plane == "main":
+    """Returns indices for different types of diagonals; plane diagonals lie in layer i"""
+    if plane == "top":
         diagonals = [
             [(j, j, i) for j in range(N)],  # Top face
             [(j, N-1-j, i) for j in range(N)]
@@ -42,38 +62,73 @@ def diagonal_indices(N: int, plane: str, i: int = 0) -> List[Tuple[int, int, int
         ]
     else:  # space
         diagonals = [
-            [(i, i, i) for i in range(N)],  # Main diagonal
-            [(i, i, N-1-i) for i in range(N)],  # Anti-diagonal
-            [(i, N-1-i, i) for i in range(N)],
-            [(N-1-i, i, i) for i in range(N)]
+            [(j, j, j) for j in range(N)],  # Main diagonal
+            [(j, j, N-1-j) for j in range(N)],  # Anti-diagonal
+            [(j, N-1-j, j) for j in range(N)],
+            [(N-1-j, j, j) for j in range(N)]
         ]
     return diagonals
 
-def objective_function(cube: List[List[List[int]]]) -> int:
-    """Calculates total cost based on deviation from magic number"""
-    N = len(cube)
-    magic_number = calculate_magic_number(N)
-    cost = 0
+def line_count(N: int) -> int:
+    """Number of lines of an N x N x N cube: 3N² rows/columns/pillars, 6N plane diagonals, 4 space diagonals"""
+    return 3 * N * N + 6 * N + 4
 
-    # Line sums (rows, columns, pillars)
+def line_indices(N: int) -> List[List[Tuple[int, int, int]]]:
+    """Returns indices of every line counted by the objective function"""
+    lines = []
+
+    # Rows, columns, pillars
     for i in range(N):
         for j in range(N):
-            row_indices = [(i, j, k) for k in range(N)]
-            col_indices = [(i, k, j) for k in range(N)]
-            pillar_indices = [(k, i, j) for k in range(N)]
-            
-            cost += abs(magic_number - line_sum(cube, row_indices))
-            cost += abs(magic_number - line_sum(cube, col_indices))
-            cost += abs(magic_number - line_sum(cube, pillar_indices))
-
-    # Main space diagonals
-    for diagonal in diagonal_indices(N, "main"):
-        cost += abs(magic_number - line_sum(cube, diagonal))
-
-    # Plane diagonals
+            lines.append([(i, j, k) for k in range(N)])
+            lines.append([(i, k, j) for k in range(N)])
+            lines.append([(k, i, j) for k in range(N)])
+
+    # Plane diagonals, two per layer in each of the three orientations
     for i in range(N):
         for plane in ["face", "side", "top"]:
-            for diagonal in diagonal_indices(N, plane, i):
-                cost += abs(magic_number - line_sum(cube, diagonal))
+            lines.extend(diagonal_indices(N, plane, i))
+
+    # Space diagonals
+    lines.extend(diagonal_indices(N, "space"))
+
+    return lines
+
+@lru_cache(maxsize=None)
+def line_table(N: int) -> Tuple[Tuple[int, ...], ...]:
+    """Returns every line as a tuple of flat cell indices, built once per N"""
+    return tuple(tuple((i * N + j) * N + k for i, j, k in indices) for indices in line_indices(N))
+
+@lru_cache(maxsize=None)
+def cell_line_table(N: int) -> Tuple[Tuple[int, ...], ...]:
+    """Returns, for each flat cell index, the ids of the lines passing through it"""
+    cell_lines: List[List[int]] = [[] for _ in range(N * N * N)]
+    for line_id, line in enumerate(line_table(N)):
+        for cell in line:
+            cell_lines[cell].append(line_id)
+    return tuple(tuple(lines) for lines in cell_lines)
+
+def line_sums(cells: FlatCube, N: int) -> List[int]:
+    """Calculates the sum of every line of a flat cube with the selected evaluation backend"""
+    # Import lokal: modul evaluators sendiri bergantung pada utils
+    from .evaluators import get_evaluator
+    return get_evaluator().line_sums(cells, N)
+
+def objective_function(cube: Union[List[List[List[int]]], FlatCube]) -> int:
+    """Calculates total cost based on deviation from magic number, with the selected evaluation backend"""
+    from .evaluators import get_evaluator
+    return get_evaluator().cost(cube)
+
+def average_cost(cost: float, N: int) -> float:
+    """Average deviation per line, as reported in the results"""
+    return round(cost / line_count(N), 4)
+
+def progress_event(iteration: int, cost: float, swap: Tuple[int, int] | None = None,
+                   state: FlatCube | None = None, evaluations: int = 1) -> Dict:
+    """Builds the progress event yielded by every algorithm stream.
 
-    return cost
\ No newline at end of file
+    A step either swaps two flat cells of the previous state, replaces it with a full
+    state, or leaves it unchanged when both are None. evaluations is the number of
+    candidates the algorithm evaluated for this step.
+    """
+    return {"iteration": iteration, "cost": cost, "swap": swap, "state": state, "evaluations": evaluations}
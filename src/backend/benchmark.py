@@ -0,0 +1,211 @@
+"""Batch benchmark for the search algorithms.
+
+Contoh:
+    uv run python benchmark.py --algorithms steepest tabu --sizes 3 5 --seeds 5 --time-limit 10 --json report.json
+    uv run python benchmark.py --json new.json --baseline report.json
+"""
+import csv
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from statistics import mean
+from typing import Dict, List
+from algorithm import metrics, stream_map
+from algorithm.budget import RunBudget, budget_params, limit_stream
+from algorithm.seeding import make_rngs
+from algorithm.evaluators import check_conformance, select_backend
+from algorithm.utils import initialize_random_cube
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FIELDS = ["algorithm", "N", "seed", "final_cost", "iterations", "duration", "time_to_target",
+          "iterations_per_second", "evaluations", "evaluations_per_second", "peak_memory_kb", "stopped_by"]
+
+def peak_memory_kb() -> int | None:
+    """Returns the peak resident memory of this process in KB, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS melaporkan byte, Linux kilobyte
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def run_once(algorithm: str, N: int, seed: int, params: Dict, budget: RunBudget, target_cost: int) -> Dict:
+    """Runs one seeded algorithm run under the budget, in its own worker process.
+
+    The budget is enforced by limit_stream, so a stopped run reports its best cost so far.
+    """
+    # Kubus awal dan run memakai seed yang sama sehingga setiap baris laporan dapat diulang
+    rng, _ = make_rngs(seed)
+    cube = initialize_random_cube(N, rng)
+    stream_function = stream_map[algorithm]
+    stream = stream_function(cube, **budget_params(stream_function, {"seed": seed, **params}, budget))
+    if not budget.unlimited:
+        stream = limit_stream(stream, cube, budget)
+
+    iterations = 0
+    time_to_target = None
+    with metrics.collect() as run_metrics:
+        start_time = time.perf_counter()
+        while True:
+            try:
+                event = next(stream)
+            except StopIteration as stop:
+                result = stop.value
+                break
+            iterations += 1
+            if time_to_target is None and event["cost"] <= target_cost:
+                time_to_target = time.perf_counter() - start_time
+        duration = time.perf_counter() - start_time
+    evaluations = run_metrics.evaluations
+    final_cost = result["final_cost"]
+
+    if time_to_target is None and final_cost <= target_cost:
+        time_to_target = duration
+    return {
+        "algorithm": algorithm,
+        "N": N,
+        "seed": seed,
+        "final_cost": final_cost,
+        "iterations": iterations,
+        "duration": round(duration, 4),
+        "time_to_target": round(time_to_target, 4) if time_to_target is not None else None,
+        "iterations_per_second": round(iterations / duration, 2) if duration > 0 else None,
+        "evaluations": evaluations,
+        "evaluations_per_second": round(evaluations / duration, 2) if duration > 0 else None,
+        "peak_memory_kb": peak_memory_kb(),
+        "stopped_by": result.get("stopped_by", "finished"),
+    }
+
+def summarize(runs: List[Dict]) -> List[Dict]:
+    """Aggregates the runs per (algorithm, N)."""
+    groups = defaultdict(list)
+    for run in runs:
+        groups[(run["algorithm"], run["N"])].append(run)
+    summary = []
+    for (algorithm, N), group in sorted(groups.items()):
+        rates = [run["iterations_per_second"] for run in group if run["iterations_per_second"]]
+        evaluation_rates = [run["evaluations_per_second"] for run in group if run["evaluations_per_second"]]
+        reached = [run["time_to_target"] for run in group if run["time_to_target"] is not None]
+        summary.append({
+            "algorithm": algorithm,
+            "N": N,
+            "runs": len(group),
+            "mean_final_cost": round(mean(run["final_cost"] for run in group), 2),
+            "best_final_cost": min(run["final_cost"] for run in group),
+            "reached_target": len(reached),
+            "mean_time_to_target": round(mean(reached), 4) if reached else None,
+            "mean_iterations_per_second": round(mean(rates), 2) if rates else None,
+            "mean_evaluations_per_second": round(mean(evaluation_rates), 2) if evaluation_rates else None,
+            "max_peak_memory_kb": max((run["peak_memory_kb"] or 0) for run in group) or None,
+        })
+    return summary
+
+def find_regressions(summary: List[Dict], baseline: List[Dict], tolerance: float) -> List[Dict]:
+    """Flags every (algorithm, N) whose mean throughput dropped more than tolerance below the baseline."""
+    previous = {(row["algorithm"], row["N"]): row for row in baseline}
+    regressions = []
+    for row in summary:
+        old = previous.get((row["algorithm"], row["N"]))
+        if not old or not old["mean_iterations_per_second"] or row["mean_iterations_per_second"] is None:
+            continue
+        ratio = row["mean_iterations_per_second"] / old["mean_iterations_per_second"]
+        if ratio < 1 - tolerance:
+            regressions.append({"algorithm": row["algorithm"], "N": row["N"], "ratio": round(ratio, 3),
+                                "baseline": old["mean_iterations_per_second"],
+                                "current": row["mean_iterations_per_second"]})
+    return regressions
+
+def write_csv(path: str, runs: List[Dict]) -> None:
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(runs)
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the magic cube search algorithms.")
+    parser.add_argument("--algorithms", nargs="+", choices=sorted(stream_map), default=sorted(stream_map))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[5], help="cube sizes N")
+    parser.add_argument("--seeds", type=int, default=3, help="number of seeds per algorithm and size")
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--max-evaluations", type=int, default=None,
+                        help="stop a run after this many candidate evaluations (see RunBudget)")
+    parser.add_argument("--time-limit", type=float, default=None, help="stop a run after this many seconds")
+    parser.add_argument("--stall-limit", type=int, default=None,
+                        help="stop a run after this many iterations without a new best")
+    parser.add_argument("--target-cost", type=int, default=0, help="cost counted as reaching the target")
+    parser.add_argument("--params", type=json.loads, default={},
+                        help='JSON params per algorithm, e.g. \'{"simulated": {"chains": 4}}\'')
+    parser.add_argument("--workers", type=int, default=None, help="parallel runs (default: all cores)")
+    parser.add_argument("--csv", help="write per-run results to this CSV file")
+    parser.add_argument("--json", help="write runs and summary to this JSON file")
+    parser.add_argument("--baseline", help="JSON report to compare throughput against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed throughput drop against the baseline (fraction)")
+    parser.add_argument("--check-evaluators", action="store_true",
+                        help="check every evaluation backend against the reference and exit")
+    return parser.parse_args(argv)
+
+def check_evaluators() -> int:
+    """Prints the conformance of every evaluation backend; non-zero exit on any mismatch."""
+    results = check_conformance()
+    for name, problems in results.items():
+        print(f"{name}: {'ok' if not problems else f'{len(problems)} mismatches'}")
+        for problem in problems[:10]:
+            print(f"  {problem}")
+    print(f"selected: {select_backend()}")
+    return 1 if any(results.values()) else 0
+
+def main(argv: List[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.check_evaluators:
+        return check_evaluators()
+    try:
+        budget = RunBudget(max_evaluations=args.max_evaluations, time_limit=args.time_limit,
+                           stall_limit=args.stall_limit)
+    except ValueError as e:
+        print(f"Invalid budget: {e}", file=sys.stderr)
+        return 2
+    tasks = [(algorithm, N, seed, args.params.get(algorithm, {}), budget, args.target_cost)
+             for algorithm in args.algorithms
+             for N in args.sizes
+             for seed in range(args.seed_start, args.seed_start + args.seeds)]
+
+    # Satu proses per run agar peak memory terukur per run dan tidak terbawa ke run berikutnya.
+    # Backend evaluasi dipilih (dan dikompilasi) saat proses dibuat, di luar waktu run
+    runs = []
+    with ProcessPoolExecutor(max_workers=args.workers, max_tasks_per_child=1, initializer=select_backend) as pool:
+        futures = [pool.submit(run_once, *task) for task in tasks]
+        for future in futures:
+            run = future.result()
+            runs.append(run)
+            print(f"{run['algorithm']:>10} N={run['N']} seed={run['seed']}: cost {run['final_cost']} "
+                  f"in {run['duration']}s ({run['iterations_per_second']} it/s)", flush=True)
+
+    summary = summarize(runs)
+    report = {"runs": runs, "summary": summary}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        report["regressions"] = find_regressions(summary, baseline["summary"], args.tolerance)
+
+    if args.csv:
+        write_csv(args.csv, runs)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(report, file, indent=2)
+
+    for row in summary:
+        print(json.dumps(row))
+    for regression in report.get("regressions", []):
+        print(f"REGRESSION {regression['algorithm']} N={regression['N']}: {regression['current']} it/s "
+              f"vs baseline {regression['baseline']} ({regression['ratio']:.0%})")
+    return 1 if report.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
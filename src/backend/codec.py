@@ -0,0 +1,177 @@
+"""Binary wire and file format for cubes and runs.
+
+A cube is its N³ cells as little-endian uint16. A run carries its scalar fields as a small
+JSON header, followed by packed arrays: the final cube, the costs, and the history as its
+initial cube plus the swap log. The whole payload is framed with zstd when the client
+accepts it and the zstandard package is installed, otherwise with gzip. The decoder
+recognises the framing from its magic bytes.
+"""
+import sys
+import gzip
+import json
+import struct
+from array import array
+from typing import Dict, List, Tuple, Union
+from algorithm import utils
+
+try:
+    import zstandard
+except ImportError:  # zstd opsional, gzip selalu tersedia
+    zstandard = None
+
+CUBE_MEDIA_TYPE = "application/x-magic-cube"
+RUN_MEDIA_TYPE = "application/x-magic-cube-run"
+CUBE_MAGIC = b"MCUB"
+RUN_MAGIC = b"MRUN"
+VERSION = 1
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+COMPRESSION_LEVEL = 6
+MAX_CELL = 0xFFFF
+
+CUBE_HEADER = struct.Struct("<4sBH")
+RUN_HEADER = struct.Struct("<4sBI")
+
+def compression_methods() -> List[str]:
+    """Returns the framings this server can write, preferred first."""
+    return ["zstd", "gzip"] if zstandard is not None else ["gzip"]
+
+def compress(data: bytes, method: str = "gzip") -> bytes:
+    if method == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package")
+        return zstandard.ZstdCompressor(level=COMPRESSION_LEVEL).compress(data)
+    if method == "gzip":
+        return gzip.compress(data, COMPRESSION_LEVEL, mtime=0)
+    raise ValueError(f"Unknown compression {method!r}")
+
+def decompress(data: bytes) -> bytes:
+    """Removes the gzip or zstd framing of a payload; unframed data is returned as is."""
+    if data[:2] == GZIP_MAGIC:
+        return gzip.decompress(data)
+    if data[:4] == ZSTD_MAGIC:
+        if zstandard is None:
+            raise ValueError("zstd payload needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+def _from_little_endian(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def pack_values(values: List[Union[int, float]]) -> Tuple[str, bytes]:
+    """Packs numbers into the narrowest array type that holds them all."""
+    if any(isinstance(value, float) for value in values):
+        return "d", _little_endian(array("d", values))
+    low, high = (min(values), max(values)) if values else (0, 0)
+    for typecode, minimum, maximum in (("H", 0, 0xFFFF), ("h", -0x8000, 0x7FFF),
+                                       ("i", -2 ** 31, 2 ** 31 - 1), ("q", -2 ** 63, 2 ** 63 - 1)):
+        if minimum <= low and high <= maximum:
+            return typecode, _little_endian(array(typecode, values))
+    raise ValueError("Value out of the 64-bit range")
+
+def encode_cells(cells: utils.FlatCube) -> bytes:
+    """Packs flat cube cells as little-endian uint16."""
+    if cells and (min(cells) < 0 or max(cells) > MAX_CELL):
+        raise ValueError("Cube values must fit in uint16")
+    return _little_endian(array("H", cells))
+
+def encode_cube(cube: Union[List[List[List[int]]], utils.FlatCube], method: str = "gzip") -> bytes:
+    cells = utils.as_flat_cube(cube)
+    N = utils.cube_size(cells)
+    return compress(CUBE_HEADER.pack(CUBE_MAGIC, VERSION, N) + encode_cells(cells), method)
+
+def decode_cube(data: bytes) -> List[List[List[int]]]:
+    """Decodes a binary cube into the nested list format used by the API."""
+    data = decompress(data)
+    if len(data) < CUBE_HEADER.size:
+        raise ValueError("Not a binary cube")
+    magic, version, N = CUBE_HEADER.unpack_from(data)
+    if magic != CUBE_MAGIC or version != VERSION:
+        raise ValueError("Not a binary cube")
+    body = data[CUBE_HEADER.size:]
+    if len(body) != 2 * N * N * N:
+        raise ValueError("Truncated binary cube")
+    return utils.unflatten_cube(array("i", _from_little_endian("H", body)))
+
+def is_binary_cube(data: bytes) -> bool:
+    try:
+        return decompress(data)[:4] == CUBE_MAGIC
+    except (OSError, ValueError, EOFError):
+        return False
+
+def parse_cube(content: bytes) -> List[List[List[int]]]:
+    """Reads a saved or uploaded cube, either a binary cube or JSON with a magic_cube list."""
+    if is_binary_cube(content):
+        return decode_cube(content)
+    data = json.loads(content)
+    magic_cube = data.get("magic_cube") if isinstance(data, dict) else None
+    if not magic_cube or not isinstance(magic_cube, list):
+        raise ValueError("Invalid cube format")
+    return magic_cube
+
+def encode_run(result: Dict, fields: Dict, method: str = "gzip") -> bytes:
+    """Encodes a raw algorithm result (flat final cube, costs, StateHistory) plus its JSON-able fields."""
+    history = result["history"]
+    steps = sorted(history.full_states)
+    sections = [
+        ("final_cube", "H", encode_cells(result["final_cube"])),
+        ("costs", *pack_values(result["costs"])),
+        ("initial", "H", encode_cells(history.initial)),
+        # Log swap: dua indeks flat per langkah, -1/-2 menandai langkah tanpa perubahan atau state utuh
+        ("swaps", *pack_values(history.swaps)),
+        ("full_state_steps", *pack_values(steps)),
+        ("full_states", "H", b"".join(encode_cells(history.full_states[step]) for step in steps)),
+    ]
+    header = json.dumps({
+        "N": utils.cube_size(result["final_cube"]),
+        "fields": fields,
+        "sections": [[name, typecode, len(body)] for name, typecode, body in sections],
+    }, separators=(",", ":")).encode()
+    body = b"".join(section[2] for section in sections)
+    return compress(RUN_HEADER.pack(RUN_MAGIC, VERSION, len(header)) + header + body, method)
+
+def decode_run(data: bytes) -> Dict:
+    """Decodes a binary run into the same shape as the JSON run response (without states)."""
+    data = decompress(data)
+    magic, version, header_size = RUN_HEADER.unpack_from(data)
+    if magic != RUN_MAGIC or version != VERSION:
+        raise ValueError("Not a binary run")
+    offset = RUN_HEADER.size
+    header = json.loads(data[offset:offset + header_size])
+    offset += header_size
+    arrays = {}
+    for name, typecode, size in header["sections"]:
+        arrays[name] = _from_little_endian(typecode, data[offset:offset + size]).tolist()
+        offset += size
+    cube_cells = header["N"] ** 3
+    full_states = arrays["full_states"]
+    return {
+        **header["fields"],
+        "final_cube": utils.unflatten_cube(array("i", arrays["final_cube"])),
+        "costs": arrays["costs"],
+        "history": {
+            "initial": utils.unflatten_cube(array("i", arrays["initial"])),
+            "swaps": arrays["swaps"],
+            "full_states": {str(step): utils.unflatten_cube(array("i", full_states[n * cube_cells:(n + 1) * cube_cells]))
+                            for n, step in enumerate(arrays["full_state_steps"])},
+        },
+    }
+
+def accepts(accept: str | None, media_type: str) -> bool:
+    """Checks whether an Accept header asks for the given media type."""
+    return any(part.split(";")[0].strip() == media_type for part in (accept or "").split(","))
+
+def negotiate_compression(accept_encoding: str | None) -> str:
+    """Picks zstd when the client lists it and the server can write it, gzip otherwise."""
+    offered = {part.split(";")[0].strip() for part in (accept_encoding or "").split(",")}
+    return "zstd" if "zstd" in offered and "zstd" in compression_methods() else "gzip"
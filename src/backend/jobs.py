@@ -0,0 +1,174 @@
+import time
+import uuid
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+from typing import Callable, Dict, Sequence
+from contextlib import nullcontext
+from algorithm import stream_map
+from algorithm import metrics, parallel, utils
+from algorithm.budget import RunBudget, budget_params, install_cancel_flag
+from algorithm.history import collect_run
+
+# Seberapa sering worker melaporkan progres dan memeriksa pembatalan (detik)
+PROGRESS_INTERVAL = 0.25
+MAX_STORED_JOBS = 64
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+def watch_cancelled(job_id: str, cancelled, flag, done: threading.Event) -> None:
+    """Raises the cancel flag of a running job once it is marked in the shared dict."""
+    while not done.wait(PROGRESS_INTERVAL):
+        if cancelled.get(job_id):
+            flag.value = 1
+            return
+
+def run_job(job_id: str, algorithm: str, cube: list, params: Dict, progress, cancelled,
+            instrument: bool = False, profile: bool = False, budget: RunBudget | None = None,
+            states: bool = False) -> Dict:
+    """Runs one algorithm in a worker process, publishing progress through the shared dicts.
+
+    With instrument (or profile) the result carries the run's metrics; a budget may stop the run early.
+    With states every progress report also carries the current flat cube.
+    Cancellation is watched by a thread and reaches the algorithm's own worker processes too,
+    so a parallel run stops while its parent is still waiting for them.
+    """
+    last_report = 0.0
+    flag = multiprocessing.Value('b', 0)
+    current = utils.as_flat_cube(cube)[:] if states else None
+
+    def report(event: Dict) -> None:
+        nonlocal last_report
+        if flag.value:
+            raise JobCancelled()
+        if current is not None:
+            if event["state"] is not None:
+                current[:] = event["state"]
+            elif event["swap"] is not None:
+                a, b = event["swap"]
+                current[a], current[b] = current[b], current[a]
+        now = time.monotonic()
+        if now - last_report < PROGRESS_INTERVAL:
+            return
+        last_report = now
+        update = {"status": "running", "iteration": event["iteration"], "cost": event["cost"]}
+        if current is not None:
+            update["state"] = current[:]
+        progress[job_id] = update
+
+    progress[job_id] = {"status": "running", "iteration": 0, "cost": None}
+    done = threading.Event()
+    threading.Thread(target=watch_cancelled, args=(job_id, cancelled, flag, done), daemon=True).start()
+    install_cancel_flag(flag)
+    try:
+        with metrics.collect(profile) if instrument or profile else nullcontext() as run_metrics:
+            stream_function = stream_map[algorithm]
+            stream = stream_function(cube, **budget_params(stream_function, params, budget))
+            result = collect_run(stream, cube, on_event=report, budget=budget)
+    finally:
+        done.set()
+        install_cancel_flag(None)
+    # Run paralel yang dihentikan pembatalan tetap selesai dengan ringkasan, tapi hasilnya dibuang
+    if flag.value:
+        raise JobCancelled()
+    if run_metrics is not None:
+        result["metrics"] = run_metrics.to_dict()
+    return result
+
+class JobManager:
+    """Runs algorithm jobs on a process pool sized to the available cores."""
+
+    def __init__(self, workers: int | None = None, on_complete: Callable[[str, Dict], None] | None = None,
+                 sizes: Sequence[int] = ()):
+        self.workers = parallel.pool_size(workers)
+        # Ukuran kubus yang tabelnya dimuat di setiap worker saat pool dibuat
+        self.sizes = tuple(sizes)
+        # Dipanggil dengan (algorithm, result) setiap kali sebuah run selesai dengan sukses
+        self.on_complete = on_complete
+        self.jobs: OrderedDict[str, Dict] = OrderedDict()
+        self._executor = None
+        self._manager = None
+
+    def start(self) -> None:
+        """Starts the manager and the warm worker pool; called at app startup or on first use."""
+        # Pool dan manager dibuat saat start atau saat pertama dipakai, bukan saat modul di-import
+        if self._executor is None:
+            self._manager = multiprocessing.Manager()
+            self.progress = self._manager.dict()
+            self.cancelled = self._manager.dict()
+            self._executor = parallel.warm_pool(self.workers, self.sizes)
+
+    def _submit(self, run_id: str, algorithm: str, cube: list, params: Dict, instrument: bool, profile: bool,
+                budget: RunBudget | None, states: bool = False) -> Future:
+        self.start()
+        future = self._executor.submit(run_job, run_id, algorithm, cube, params, self.progress, self.cancelled,
+                                       instrument, profile, budget, states)
+        if self.on_complete is not None:
+            future.add_done_callback(lambda done: self._completed(algorithm, done))
+        return future
+
+    def _completed(self, algorithm: str, future: Future) -> None:
+        if not future.cancelled() and future.exception() is None:
+            self.on_complete(algorithm, future.result())
+
+    def run(self, algorithm: str, cube: list, params: Dict, instrument: bool = False, profile: bool = False,
+            budget: RunBudget | None = None) -> Future:
+        """Submits a run without registering it as a job and returns its future."""
+        run_id = uuid.uuid4().hex
+        future = self._submit(run_id, algorithm, cube, params, instrument, profile, budget)
+        future.add_done_callback(lambda _: self.progress.pop(run_id, None))
+        return future
+
+    def submit(self, algorithm: str, cube: list, params: Dict, instrument: bool = False, profile: bool = False,
+               budget: RunBudget | None = None, states: bool = False) -> str:
+        """Submits a run as a tracked job and returns its id; with states its progress carries the current cube."""
+        job_id = uuid.uuid4().hex
+        future = self._submit(job_id, algorithm, cube, params, instrument, profile, budget, states)
+        self.jobs[job_id] = {"algorithm": algorithm, "future": future}
+        self._evict()
+        return job_id
+
+    def _evict(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job["future"].done()]
+        while len(self.jobs) > MAX_STORED_JOBS and finished:
+            self.forget(finished.pop(0))
+
+    def forget(self, job_id: str) -> None:
+        self.jobs.pop(job_id, None)
+        self.progress.pop(job_id, None)
+        self.cancelled.pop(job_id, None)
+
+    def status(self, job_id: str) -> Dict:
+        """Returns the status and latest progress of a job."""
+        job = self.jobs[job_id]
+        future = job["future"]
+        report = dict(self.progress.get(job_id, {"status": "queued", "iteration": 0, "cost": None}))
+        report.update(job_id=job_id, algorithm=job["algorithm"], error=None)
+        if future.done():
+            try:
+                result = future.result()
+                report.update(status="completed", iteration=result["iteration"], cost=result["final_cost"])
+            except (CancelledError, JobCancelled):
+                report["status"] = "cancelled"
+            except Exception as e:
+                report.update(status="failed", error=str(e))
+        return report
+
+    def result(self, job_id: str) -> Dict:
+        """Returns the raw result of a completed job."""
+        return self.jobs[job_id]["future"].result()
+
+    def cancel(self, job_id: str) -> None:
+        """Cancels a queued job or asks a running one to stop at its next progress check."""
+        job = self.jobs[job_id]
+        if not job["future"].cancel():
+            self.cancelled[job_id] = True
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._manager.shutdown()
+            self._executor = None
+            self._manager = None
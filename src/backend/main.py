@@ -1,22 +1,42 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import os
 import json
+import uuid
+import asyncio
+import time
+import inspect
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from algorithm.utils import (
     initialize_random_cube,
-    objective_function
-)
-from algorithm import (
-    steepest_ascent_algorithm,
-    sideways_move_algorithm,
-    stochastic_algorithm,
-    random_restart_algorithm,
-    simulated_annealing_algorithm,
-    genetic_algorithm,
+    unflatten_cube
 )
+from algorithm import param_checks, stream_map
+from algorithm.cache import cost_cache
+from algorithm.budget import RunBudget
+from algorithm.evaluators import get_evaluator, select_backend
+from algorithm.metrics import MetricsRegistry
+from algorithm.seeding import make_rngs
+import codec
+from jobs import JobManager, PROGRESS_INTERVAL
+from store import ResultStore, result_key, encode_result, decode_result
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Indeks kubus tersimpan disinkronkan sekali saat start, setelah itu tanpa scan direktori
+    await asyncio.to_thread(result_store.sync_saved, SAVE_DIR, cost_cache.score)
+    # Backend evaluasi dipilih sebelum worker di-fork, sehingga worker mewarisi pilihannya
+    await asyncio.to_thread(select_backend)
+    # Worker di-fork sekarang, bukan pada request pertama
+    await asyncio.to_thread(job_manager.start)
+    yield
+    job_manager.shutdown()
+    result_store.close()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,17 +47,65 @@ app.add_middleware(
 )
 
 N = 5
+MAX_N = 12
+MAX_STORED_RUNS = 32
 SAVE_DIR = "./cube"
+RESULT_STORE_PATH = "./results.db"
+# Ekstensi file per format simpan kubus
+SAVE_FORMATS = {"json": ".json", "binary": ".cube"}
+# Tambahan waktu setelah deadline race agar peserta sempat mengembalikan hasil terbaiknya sendiri
+RACE_GRACE = 1.0
 if not os.path.exists(SAVE_DIR):
     os.makedirs(SAVE_DIR)
 
+# Hasil run yang sudah selesai, dipakai ulang untuk request dengan algoritma, kubus, params dan seed yang sama
+result_store = ResultStore(RESULT_STORE_PATH)
+
+metrics_registry = MetricsRegistry()
+# Worker memuat tabel garis ukuran default sekali saat pool dibuat
+job_manager = JobManager(on_complete=metrics_registry.observe, sizes=(N,))
+
 class CubeInitResponse(BaseModel):
     initial_cube: list
     initial_cost: int
 
+class RunBudgetRequest(BaseModel):
+    max_evaluations: int | None = None
+    time_limit: float | None = None
+    target_cost: float | None = None
+    stall_limit: int | None = None
+
 class AlgorithmRequest(BaseModel):
     algorithm: str
     cube: list
+    params: dict = {}
+    full_states: bool = False
+    # Seed run; dengan seed dan parameter yang sama hasilnya dapat diulang persis
+    seed: int | None = None
+    # Instrumentasi opsional: counter evaluasi dan timer per fase, profile menambahkan dump cProfile
+    metrics: bool = False
+    profile: bool = False
+    # Batas run (evaluasi, waktu, target cost, stall); run berhenti lebih awal dengan hasil terbaik sejauh ini
+    budget: RunBudgetRequest | None = None
+
+class StreamRequest(AlgorithmRequest):
+    include_states: bool = False
+    every: int = 1
+
+class RaceEntrant(BaseModel):
+    algorithm: str
+    params: dict = {}
+    seed: int | None = None
+    label: str | None = None
+
+class RaceRequest(BaseModel):
+    cube: list
+    # Kosong berarti semua algoritma dengan parameter default
+    entrants: list[RaceEntrant] = []
+    # Seed default untuk peserta tanpa seed sendiri
+    seed: int | None = None
+    target_cost: float = 0
+    deadline: float = 60.0
 
 class AlgorithmResponse(BaseModel):
     final_cube: list
@@ -45,17 +113,41 @@ class AlgorithmResponse(BaseModel):
     average_cost: float
     duration: float
     iteration: int
+    evaluations: int | None = None
+    stopped_by: str | None = None
     restart: int | None = None
     iteration_restart: list | None = None
     local_optima: int | None = None
     population: int | None = None
     costs: list
-    states: list
+    history: dict
+    run_id: str
+    states: list | None = None
     exps: list | None = None
+    island_costs: list | None = None
+    chain_stats: list | None = None
+    exchange_acceptance: list | None = None
+    metrics: dict | None = None
+    cached: bool = False
+
+class JobResponse(BaseModel):
+    job_id: str
+    algorithm: str
+    status: str
+    iteration: int
+    cost: float | None = None
+    error: str | None = None
 
 class CubeData(BaseModel):
     file_name: str
     cube: list
+    # "json" atau "binary" (uint16 little-endian, gzip)
+    format: str = "json"
+
+class SavedCubeResponse(BaseModel):
+    file_name: str
+    cube: list
+    cost: int | None = None
 
 class CubeCostRequest(BaseModel):
     cube: list
@@ -63,75 +155,441 @@ class CubeCostRequest(BaseModel):
 class CubeCostResponse(BaseModel):
     cost: int
 
-algorithm_map = {
-    'steepest': steepest_ascent_algorithm,
-    'sideways': sideways_move_algorithm,
-    'stochastic': stochastic_algorithm,
-    'random': random_restart_algorithm,
-    'simulated': simulated_annealing_algorithm,
-    'genetic': genetic_algorithm
-}
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+    bytes: int
+    hit_rate: float
+
+class RunStateResponse(BaseModel):
+    run_id: str
+    step: int
+    state: list
+
+# History run terakhir untuk rekonstruksi state per langkah oleh media player
+run_histories = OrderedDict()
+
+def store_history(history) -> str:
+    run_id = uuid.uuid4().hex
+    run_histories[run_id] = history
+    while len(run_histories) > MAX_STORED_RUNS:
+        run_histories.popitem(last=False)
+    return run_id
+
+def run_params(request: AlgorithmRequest) -> dict:
+    """Returns the algorithm params of a request, with the request seed included."""
+    if request.seed is None:
+        return request.params
+    return {**request.params, "seed": request.seed}
+
+def check_cube(cube: list) -> None:
+    """Rejects anything but an N x N x N permutation of 1..N³ with N at most MAX_N."""
+    N = len(cube)
+    if not 2 <= N <= MAX_N:
+        raise HTTPException(status_code=400, detail=f"Invalid cube: N must be between 2 and {MAX_N}")
+    if any(not isinstance(layer, list) or len(layer) != N or
+           any(not isinstance(row, list) or len(row) != N for row in layer) for layer in cube):
+        raise HTTPException(status_code=400, detail="Invalid cube: not N x N x N")
+    cells = [value for layer in cube for row in layer for value in row]
+    if any(type(value) is not int for value in cells) or set(cells) != set(range(1, N ** 3 + 1)):
+        raise HTTPException(status_code=400, detail=f"Invalid cube: values must be 1..{N ** 3}, each once")
+
+def get_stream_function(request: AlgorithmRequest):
+    """Looks up the requested algorithm and checks its cube and params."""
+    stream_function = stream_map.get(request.algorithm)
+    if not stream_function:
+        raise HTTPException(status_code=404, detail="Algorithm not found")
+    check_cube(request.cube)
+    # Budget hanya lewat field budget, agar juga berlaku di luar stream algoritma
+    if "budget" in request.params:
+        raise HTTPException(status_code=400, detail="Invalid params: pass the budget in the budget field")
+    try:
+        arguments = inspect.signature(stream_function).bind(request.cube, **run_params(request))
+    except TypeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid params: {e}")
+    check = param_checks.get(request.algorithm)
+    if check is not None:
+        arguments.apply_defaults()
+        try:
+            check(**{name: arguments.arguments[name] for name in inspect.signature(check).parameters})
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid params: {e}")
+    return stream_function
+
+def run_budget(request: AlgorithmRequest) -> RunBudget | None:
+    """Converts the request budget into a RunBudget, None when the run is unlimited."""
+    if request.budget is None:
+        return None
+    try:
+        budget = RunBudget(**request.budget.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid budget: {e}")
+    return None if budget.unlimited else budget
+
+# Field AlgorithmResponse di luar kubus, costs dan history
+RESULT_FIELDS = ("final_cost", "average_cost", "duration", "iteration", "evaluations", "stopped_by", "restart",
+                 "iteration_restart", "local_optima", "population", "exps", "island_costs", "chain_stats", "exchange_acceptance", "metrics")
+
+def result_fields(result: dict, cached: bool) -> dict:
+    """Returns the small fields of a run response and registers its history for the media player."""
+    fields = {name: result.get(name, None) for name in RESULT_FIELDS}
+    fields["run_id"] = store_history(result["history"])
+    fields["cached"] = cached
+    return fields
+
+def format_result(result: dict, full_states: bool, cached: bool = False) -> dict:
+    """Converts a raw algorithm result into the AlgorithmResponse shape."""
+    history = result.get("history")
+    start = time.perf_counter()
+    response = result_fields(result, cached)
+    # Algoritma bekerja dengan buffer flat, API tetap memakai nested list
+    response["final_cube"] = unflatten_cube(result.get("final_cube"))
+    response["costs"] = result.get("costs")
+    response["history"] = history.to_dict()
+    response["states"] = [unflatten_cube(state) for state in history.states()] if full_states else None
+    if response["metrics"] is not None:
+        response["metrics"]["timers"]["serialization"] = round(time.perf_counter() - start, 6)
+    return response
+
+def result_response(http_request: Request, result: dict, full_states: bool, cached: bool = False) -> Response:
+    """Returns a run in the binary run format when the client accepts it, as JSON otherwise.
+
+    Both bypass response_model validation, which dominates the latency of runs with
+    thousands of states. The binary format carries the history instead of the states.
+    """
+    if codec.accepts(http_request.headers.get("accept"), codec.RUN_MEDIA_TYPE):
+        method = codec.negotiate_compression(http_request.headers.get("accept-encoding"))
+        body = codec.encode_run(result, result_fields(result, cached), method)
+        return Response(body, media_type=codec.RUN_MEDIA_TYPE)
+    return JSONResponse(format_result(result, full_states, cached))
+
+def cube_response(http_request: Request, cube: list, cost: int | None, content: dict) -> Response | dict:
+    """Returns a cube as a binary cube when the client accepts it, the cost going into X-Cube-Cost."""
+    if not codec.accepts(http_request.headers.get("accept"), codec.CUBE_MEDIA_TYPE):
+        return content
+    method = codec.negotiate_compression(http_request.headers.get("accept-encoding"))
+    headers = {"X-Cube-Cost": str(cost)} if cost is not None else None
+    return Response(codec.encode_cube(cube, method), media_type=codec.CUBE_MEDIA_TYPE, headers=headers)
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_events(job_id: str, include_states: bool, every: int):
+    """Forwards the progress of a job as Server-Sent Events while the run is in progress.
+
+    The worker reports every PROGRESS_INTERVAL seconds, so an event is sent once the
+    iteration has advanced by at least every since the previous one. The result event
+    carries the run_id of the finished run for the media player.
+    """
+    reported = 0
+    status = job_manager.status(job_id)
+    try:
+        while status["status"] in ("queued", "running"):
+            if status["cost"] is not None and status["iteration"] - reported >= every:
+                reported = status["iteration"]
+                progress = {"iteration": status["iteration"], "cost": status["cost"]}
+                if include_states and "state" in status:
+                    progress["state"] = unflatten_cube(status["state"])
+                yield sse_event("progress", progress)
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            status = job_manager.status(job_id)
+    finally:
+        # Client memutus koneksi sebelum run selesai: job tidak perlu dilanjutkan
+        if status["status"] in ("queued", "running"):
+            job_manager.cancel(job_id)
+
+    if status["status"] != "completed":
+        yield sse_event("error", {"detail": status["error"] or f"Run {status['status']}"})
+        return
+    result = job_manager.result(job_id)
+    job_manager.forget(job_id)
+    yield sse_event("result", {**result_fields(result, cached=False), "final_cube": unflatten_cube(result["final_cube"])})
 
 @app.get("/initialize_cube", response_model=CubeInitResponse)
-async def initialize_cube():
-    initial_cube = initialize_random_cube(N)
-    initial_cost = objective_function(initial_cube)
-    return {
+async def initialize_cube(http_request: Request, N: int = Query(N, ge=2, le=MAX_N), seed: int | None = None):
+    rng, _ = make_rngs(seed)
+    initial_cube = initialize_random_cube(N, rng)
+    initial_cost = get_evaluator().cost(initial_cube)
+    return cube_response(http_request, initial_cube, initial_cost, {
         "initial_cube": initial_cube,
         "initial_cost": initial_cost
-    }
+    })
 
 @app.post("/run_algorithm", response_model=AlgorithmResponse)
-async def run_algorithm(request: AlgorithmRequest):
-    algorithm_function = algorithm_map.get(request.algorithm)
-    if not algorithm_function:
-        raise HTTPException(status_code=404, detail="Algorithm not found")
+async def run_algorithm(request: AlgorithmRequest, http_request: Request):
+    stream_function = get_stream_function(request)
+    params = run_params(request)
+    budget = run_budget(request)
+
+    # Hanya run dengan seed yang dapat diulang persis; run berinstrumen atau dengan batas waktu selalu diulang.
+    # Batas yang diperiksa di worker (budget algoritma paralel, time_limit dan target_cost random restart)
+    # berhenti menurut urutan kerja worker, jadi run seperti itu juga tidak disimpan
+    key = None
+    timed = params.get("time_limit") is not None or params.get("target_cost") is not None or \
+        (budget is not None and "budget" in inspect.signature(stream_function).parameters)
+    if request.seed is not None and not (request.metrics or request.profile) and not timed and \
+            (budget is None or budget.time_limit is None):
+        key = result_key(request.algorithm, request.cube, params, budget.to_dict() if budget is not None else None)
+        stored = await asyncio.to_thread(result_store.get, key)
+        if stored is not None:
+            return result_response(http_request, decode_result(stored), request.full_states, cached=True)
 
     try:
-        result = algorithm_function(request.cube)
-        return {
-            "final_cube": result.get("final_cube"),
-            "final_cost": result.get("final_cost"),
-            "average_cost": result.get("average_cost"),
-            "duration": result.get("duration"),
-            "iteration": result.get("iteration"),
-            "restart": result.get("restart", None),
-            "iteration_restart": result.get("iteration_restart", None),
-            "local_optima": result.get("local_optima", None),
-            "population": result.get("population", None),
-            "costs": result.get("costs"),
-            "states": result.get("states"),
-            "exps": result.get("exps", None)
-        }
+        # Algoritma dijalankan di process pool agar event loop tetap melayani request lain
+        result = await asyncio.wrap_future(job_manager.run(request.algorithm, request.cube, params,
+                                                           request.metrics, request.profile, budget))
+        if key is not None:
+            await asyncio.to_thread(result_store.put, key, request.algorithm, encode_result(result))
+        return result_response(http_request, result, request.full_states)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/run_algorithm/stream")
+async def run_algorithm_stream(request: StreamRequest):
+    get_stream_function(request)
+    if request.every < 1:
+        raise HTTPException(status_code=400, detail="every must be at least 1")
+    # Run berjalan di process pool job; stream hanya meneruskan progres dari worker
+    job_id = job_manager.submit(request.algorithm, request.cube, run_params(request), budget=run_budget(request),
+                                states=request.include_states)
+    return StreamingResponse(
+        stream_events(job_id, request.include_states, request.every),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+def race_entrants(request: RaceRequest) -> list:
+    """Returns the entrants of a race as validated algorithm requests with their labels."""
+    entrants = request.entrants or [RaceEntrant(algorithm=algorithm) for algorithm in stream_map]
+    runs = []
+    for entrant in entrants:
+        run = AlgorithmRequest(algorithm=entrant.algorithm, cube=request.cube, params=entrant.params,
+                               seed=entrant.seed if entrant.seed is not None else request.seed)
+        get_stream_function(run)
+        label = entrant.label or entrant.algorithm
+        runs.append((label, run))
+    return runs
+
+async def race_events(runs: list, target_cost: float, deadline: float):
+    """Races the entrants on the job pool and reports their best costs as Server-Sent Events.
+
+    Every entrant runs with the target cost and the deadline as its budget. The first one
+    to reach the target wins and the others are cancelled; otherwise the lowest cost at
+    the deadline wins.
+    """
+    start = time.perf_counter()
+    budget = RunBudget(time_limit=deadline, target_cost=target_cost)
+    entrants = []
+    for index, (label, run) in enumerate(runs):
+        job_id = job_manager.submit(run.algorithm, run.cube, run_params(run), budget=budget)
+        entrants.append({"entrant": index, "label": label, "algorithm": run.algorithm, "job_id": job_id,
+                         "status": "queued", "iteration": 0, "best_cost": None, "final_cost": None,
+                         "stopped_by": None, "duration": None, "elapsed": None})
+    winner = None
+    try:
+        while True:
+            for entrant in entrants:
+                if entrant["status"] in ("completed", "cancelled", "failed"):
+                    continue
+                status = job_manager.status(entrant["job_id"])
+                entrant["status"] = status["status"]
+                if status["status"] == "completed":
+                    result = job_manager.result(entrant["job_id"])
+                    entrant.update(iteration=result["iteration"], final_cost=result["final_cost"],
+                                   stopped_by=result.get("stopped_by"), duration=result["duration"],
+                                   elapsed=round(time.perf_counter() - start, 2), result=result)
+                    # Cost progres GA adalah rata-rata populasi, cost akhir selalu yang terbaik
+                    entrant["best_cost"] = result["final_cost"]
+                    yield sse_event("finished", race_standing(entrant))
+                    if winner is None and result["final_cost"] <= target_cost:
+                        winner = entrant
+                elif status["status"] == "failed":
+                    yield sse_event("finished", {**race_standing(entrant), "error": status["error"]})
+                elif status["cost"] is not None and status["iteration"] != entrant["iteration"]:
+                    entrant["iteration"] = status["iteration"]
+                    if entrant["best_cost"] is None or status["cost"] < entrant["best_cost"]:
+                        entrant["best_cost"] = status["cost"]
+                    yield sse_event("progress", {"entrant": entrant["entrant"], "label": entrant["label"],
+                                                 "iteration": status["iteration"], "cost": status["cost"],
+                                                 "best_cost": entrant["best_cost"]})
+
+            running = [entrant for entrant in entrants if entrant["status"] in ("queued", "running")]
+            if winner is not None or not running:
+                break
+            if time.perf_counter() - start > deadline + RACE_GRACE:
+                break
+            await asyncio.sleep(PROGRESS_INTERVAL)
+    finally:
+        # Peserta yang belum selesai dibatalkan, juga saat client memutus koneksi
+        for entrant in entrants:
+            if entrant["status"] in ("queued", "running"):
+                job_manager.cancel(entrant["job_id"])
+                entrant["status"] = "cancelled"
+
+    if winner is None:
+        finished = [entrant for entrant in entrants if "result" in entrant]
+        winner = min(finished, key=lambda entrant: entrant["final_cost"], default=None)
+    if winner is None:
+        yield sse_event("error", {"detail": "No entrant finished before the deadline",
+                                  "standings": [race_standing(entrant) for entrant in entrants]})
+        return
+    result = winner["result"]
+    yield sse_event("result", {
+        "winner": winner["entrant"],
+        "label": winner["label"],
+        "algorithm": winner["algorithm"],
+        "final_cost": result["final_cost"],
+        "stopped_by": result.get("stopped_by"),
+        "reached_target": result["final_cost"] <= target_cost,
+        "duration": result["duration"],
+        "elapsed": winner["elapsed"],
+        "final_cube": unflatten_cube(result["final_cube"]),
+        "run_id": store_history(result["history"]),
+        "standings": [race_standing(entrant) for entrant in entrants],
+    })
+
+def race_standing(entrant: dict) -> dict:
+    return {name: entrant[name] for name in ("entrant", "label", "algorithm", "status", "best_cost", "final_cost",
+                                            "stopped_by", "duration", "elapsed")}
+
+@app.post("/race")
+async def race(request: RaceRequest):
+    if request.deadline <= 0:
+        raise HTTPException(status_code=400, detail="deadline must be positive")
+    runs = race_entrants(request)
+    if not runs:
+        raise HTTPException(status_code=400, detail="No entrants")
+    return StreamingResponse(
+        race_events(runs, request.target_cost, request.deadline),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+@app.post("/jobs", response_model=JobResponse)
+async def submit_job(request: AlgorithmRequest):
+    get_stream_function(request)
+    job_id = job_manager.submit(request.algorithm, request.cube, run_params(request), request.metrics, request.profile,
+                                run_budget(request))
+    return job_manager.status(job_id)
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    if job_id not in job_manager.jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_manager.status(job_id)
+
+@app.get("/jobs/{job_id}/result", response_model=AlgorithmResponse)
+async def get_job_result(job_id: str, http_request: Request, full_states: bool = False):
+    if job_id not in job_manager.jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    status = job_manager.status(job_id)
+    if status["status"] != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {status['status']}")
+    return result_response(http_request, job_manager.result(job_id), full_states)
+
+@app.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    if job_id not in job_manager.jobs:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job_manager.cancel(job_id)
+    return job_manager.status(job_id)
+
+@app.get("/runs/{run_id}/states/{step}", response_model=RunStateResponse)
+async def get_run_state(run_id: str, step: int, http_request: Request):
+    history = run_histories.get(run_id)
+    if history is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    try:
+        state = history.state_at(step)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="Step out of range")
+    cube = unflatten_cube(state)
+    return cube_response(http_request, cube, None, {"run_id": run_id, "step": step, "state": cube})
+
 @app.post("/calculate_cost", response_model=CubeCostResponse)
 async def calculate_cost(request: CubeCostRequest):
+    check_cube(request.cube)
     try:
-        cost = objective_function(request.cube)
+        # Kubus yang sama sering dihitung ulang saat run diputar, cost diambil dari cache
+        cost = cost_cache.score(request.cube)
         return {"cost": cost}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/cache_stats", response_model=CacheStatsResponse)
+async def cache_stats():
+    return cost_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    cache = cost_cache.stats()
+    store = result_store.stats()
+    return metrics_registry.render({
+        "magic_cube_cost_cache_hits": cache["hits"],
+        "magic_cube_cost_cache_misses": cache["misses"],
+        "magic_cube_cost_cache_size": cache["size"],
+        "magic_cube_result_store_hits": store["hits"],
+        "magic_cube_result_store_misses": store["misses"],
+        "magic_cube_result_store_size": store["size"],
+        "magic_cube_result_store_bytes": store["bytes"],
+    })
+
 @app.post("/save_cube")
 async def save_cube(cube_data: CubeData):
-    file_path = os.path.join(SAVE_DIR, f"{cube_data.file_name}.json")
-    with open(file_path, "w") as file:
-        json.dump({"magic_cube": cube_data.cube}, file)
+    if not cube_data.file_name or os.path.basename(cube_data.file_name) != cube_data.file_name:
+        raise HTTPException(status_code=400, detail="Invalid file name")
+    if cube_data.format not in SAVE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(SAVE_FORMATS)}")
+    file_path = os.path.join(SAVE_DIR, cube_data.file_name + SAVE_FORMATS[cube_data.format])
+    if cube_data.format == "binary":
+        try:
+            content = codec.encode_cube(cube_data.cube)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid cube: {e}")
+        with open(file_path, "wb") as file:
+            file.write(content)
+    else:
+        with open(file_path, "w") as file:
+            json.dump({"magic_cube": cube_data.cube}, file)
+    # Satu nama satu file: salinan dalam format lain dihapus agar indeks tidak ambigu
+    for extension in SAVE_FORMATS.values():
+        other_path = os.path.join(SAVE_DIR, cube_data.file_name + extension)
+        if other_path != file_path and os.path.exists(other_path):
+            os.remove(other_path)
+    try:
+        cost = cost_cache.score(cube_data.cube)
+    except (ValueError, TypeError):
+        cost = None
+    result_store.save_cube(cube_data.file_name, file_path, cube_data.cube, cost)
     return {"message": "Cube saved successfully"}
 
+@app.get("/saved_cubes")
+async def saved_cubes():
+    return result_store.saved_cubes()
+
+@app.get("/load_cube/{file_name}", response_model=SavedCubeResponse)
+async def load_saved_cube(file_name: str, http_request: Request):
+    saved = result_store.load_cube(file_name)
+    if saved is None:
+        raise HTTPException(status_code=404, detail="Cube not found")
+    return cube_response(http_request, saved["cube"], saved["cost"], saved)
+
 @app.post("/load_cube", response_model=CubeInitResponse)
 async def load_cube(file: UploadFile = File(...)):
+    content = await file.read()
+    # JSON maupun kubus biner diterima
     try:
-        content = await file.read()
-        data = json.loads(content)
-        magic_cube = data.get("magic_cube")
-        if not magic_cube or not isinstance(magic_cube, list):
-            raise HTTPException(status_code=400, detail="Invalid cube format")
+        magic_cube = codec.parse_cube(content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Failed to load cube: {e}")
+    check_cube(magic_cube)
 
+    try:
         # Check if the loaded cube meets the magic cube objective
-        cost = objective_function(magic_cube)
+        cost = cost_cache.score(magic_cube)
         return {
             "initial_cube": magic_cube,
             "initial_cost": cost
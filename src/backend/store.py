@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from array import array
+from typing import Dict, List
+from algorithm.history import StateHistory
+from algorithm.utils import flatten_cube
+from codec import parse_cube
+
+# Batas total ukuran blob hasil (terkompresi) sebelum entri lama dibuang
+DEFAULT_STORE_BYTES = 256 * 1024 * 1024
+COMPRESSION_LEVEL = 6
+CUBE_EXTENSIONS = (".json", ".cube")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    algorithm TEXT NOT NULL,
+    blob BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed);
+CREATE TABLE IF NOT EXISTS saved_cubes (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    N INTEGER NOT NULL,
+    cost INTEGER,
+    mtime REAL NOT NULL,
+    blob BLOB NOT NULL
+);
+"""
+
+def result_key(algorithm: str, cube: list, params: Dict, budget: Dict | None = None) -> str:
+    """Returns the content hash of a run: algorithm, cube cells, params (seed included) and budget."""
+    run = {
+        "algorithm": algorithm,
+        "cube": flatten_cube(cube).tolist(),
+        "params": params,
+    }
+    # Run tanpa budget tetap memakai key yang sama seperti sebelumnya
+    if budget is not None:
+        run["budget"] = budget
+    payload = json.dumps(run, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def encode_result(result: Dict) -> Dict:
+    """Converts a raw algorithm result into plain JSON data for the store."""
+    return {**result, "final_cube": list(result["final_cube"]), "history": result["history"].to_dict()}
+
+def decode_result(data: Dict) -> Dict:
+    """Inverse of encode_result: restores the flat final cube and the state history."""
+    return {**data, "final_cube": array('i', data["final_cube"]), "history": StateHistory.from_dict(data["history"])}
+
+def pack(data) -> bytes:
+    return zlib.compress(json.dumps(data, separators=(",", ":")).encode(), COMPRESSION_LEVEL)
+
+def unpack(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+class ResultStore:
+    """SQLite store of finished runs keyed by result_key, plus an index of the saved cubes.
+
+    Results are held as zlib-compressed JSON; once their total size passes max_bytes the
+    least recently read entries are evicted.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_STORE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Koneksi dibuka saat pertama dipakai, bukan saat modul di-import
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def get(self, key: str) -> Dict | None:
+        """Returns the stored result of a run, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT blob FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            with self._db:
+                self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+        return unpack(row[0])
+
+    def put(self, key: str, algorithm: str, result: Dict) -> None:
+        """Stores a finished run, evicting the least recently read results beyond max_bytes."""
+        blob = pack(result)
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                             (key, algorithm, blob, len(blob), now, now))
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Buang dari yang paling lama tidak dibaca, hasil yang baru disimpan tetap ada
+            evicted = []
+            for old_key, size in self._db.execute("SELECT key, size FROM results WHERE key != ? ORDER BY accessed",
+                                                  (key,)):
+                if total <= self.max_bytes:
+                    break
+                evicted.append((old_key,))
+                total -= size
+            self._db.executemany("DELETE FROM results WHERE key = ?", evicted)
+
+    def save_cube(self, name: str, path: str, cube: list, cost: int | None) -> None:
+        """Adds or updates a saved cube in the index."""
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO saved_cubes VALUES (?, ?, ?, ?, ?, ?)",
+                             (name, path, len(cube), cost, os.path.getmtime(path), pack(cube)))
+
+    def saved_cubes(self) -> List[str]:
+        with self._lock:
+            return [name for name, in self._db.execute("SELECT name FROM saved_cubes ORDER BY name")]
+
+    def load_cube(self, name: str) -> Dict | None:
+        """Returns a saved cube with its cost, or None if it is not indexed."""
+        with self._lock:
+            row = self._db.execute("SELECT name, cost, blob FROM saved_cubes WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        return {"file_name": row[0], "cube": unpack(row[2]), "cost": row[1]}
+
+    def sync_saved(self, directory: str, score) -> None:
+        """Brings the saved-cube index in line with the JSON and binary cube files in directory.
+
+        Runs once at startup; new or modified files are indexed with score(cube) as their
+        cost and entries whose file is gone are dropped.
+        """
+        with self._lock:
+            indexed = {name: mtime for name, mtime in self._db.execute("SELECT name, mtime FROM saved_cubes")}
+        present = set()
+        for entry in os.scandir(directory):
+            name, extension = os.path.splitext(entry.name)
+            if extension not in CUBE_EXTENSIONS:
+                continue
+            present.add(name)
+            if indexed.get(name) == entry.stat().st_mtime:
+                continue
+            try:
+                with open(entry.path, "rb") as file:
+                    cube = parse_cube(file.read())
+                self.save_cube(name, entry.path, cube, score(cube))
+            except (OSError, ValueError, KeyError, TypeError, AttributeError):
+                continue
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM saved_cubes WHERE name = ?",
+                                 [(name,) for name in indexed.keys() - present])
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": count,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
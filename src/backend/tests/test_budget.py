@@ -0,0 +1,55 @@
+import random
+import time
+from algorithm import random_restart_algorithm, stochastic_algorithm, utils
+from algorithm.budget import RunBudget
+from jobs import JobManager
+
+def test_single_process_run_stops_at_evaluation_budget():
+    cube = utils.initialize_random_cube(3, random.Random(0))
+    result = stochastic_algorithm(cube, seed=0, max_iteration=100000, budget=RunBudget(max_evaluations=250))
+    assert result["stopped_by"] == "evaluations"
+    assert result["iteration"] == result["evaluations"] == 250
+    assert result["final_cost"] == utils.objective_function(result["final_cube"])
+    assert result["history"].state_at(-1) == result["final_cube"]
+
+def test_single_process_run_finishes_within_budget():
+    cube = utils.initialize_random_cube(3, random.Random(1))
+    result = stochastic_algorithm(cube, seed=1, max_iteration=100, budget=RunBudget(max_evaluations=10 ** 6))
+    assert result["stopped_by"] == "finished"
+    assert result["iteration"] == 100
+
+def test_parallel_run_stops_at_evaluation_budget():
+    cube = utils.initialize_random_cube(3, random.Random(2))
+    budget = RunBudget(max_evaluations=3000)
+    result = random_restart_algorithm(cube, max_restart=4, max_iterations=10 ** 6, max_stall=10 ** 6, workers=1,
+                                      target_cost=None, seed=2, budget=budget)
+    assert result["stopped_by"] == "evaluations"
+    assert result["evaluations"] >= 3000
+    # Ringkasan milik stream paralel tetap dipakai
+    assert 1 <= result["restart"] <= 4
+    assert len(result["iteration_restart"]) == result["restart"]
+    assert result["final_cost"] == utils.objective_function(result["final_cube"])
+
+def test_parallel_run_stops_at_time_budget():
+    cube = utils.initialize_random_cube(4, random.Random(3))
+    start = time.perf_counter()
+    result = random_restart_algorithm(cube, max_restart=2, max_iterations=10 ** 8, max_stall=10 ** 8, workers=2,
+                                      target_cost=None, seed=3, budget=RunBudget(time_limit=0.5))
+    assert result["stopped_by"] == "time"
+    assert time.perf_counter() - start < 10
+    assert result["final_cost"] == utils.objective_function(result["final_cube"])
+
+def test_cancelled_job_stops():
+    manager = JobManager(workers=1)
+    try:
+        cube = utils.initialize_random_cube(3, random.Random(4))
+        job_id = manager.submit("stochastic", cube, {"max_iteration": 10 ** 9})
+        deadline = time.monotonic() + 30
+        while manager.status(job_id)["status"] != "running" and time.monotonic() < deadline:
+            time.sleep(0.05)
+        manager.cancel(job_id)
+        while manager.status(job_id)["status"] == "running" and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert manager.status(job_id)["status"] == "cancelled"
+    finally:
+        manager.shutdown()
@@ -0,0 +1,39 @@
+import json
+import random
+import pytest
+import codec
+from algorithm import stochastic_algorithm, utils
+
+@pytest.mark.parametrize("method", codec.compression_methods())
+def test_cube_round_trip(method):
+    cube = utils.initialize_random_cube(4, random.Random(0))
+    data = codec.encode_cube(cube, method)
+    assert codec.is_binary_cube(data)
+    assert codec.decode_cube(data) == cube
+    assert codec.parse_cube(data) == cube
+
+def test_parse_cube_reads_json():
+    cube = utils.initialize_random_cube(3, random.Random(1))
+    assert codec.parse_cube(json.dumps({"magic_cube": cube}).encode()) == cube
+
+@pytest.mark.parametrize("content", [b"[1, 2, 3]", b'{"magic_cube": []}', b'{"cube": [[[1]]]}'])
+def test_parse_cube_rejects_invalid_json(content):
+    with pytest.raises(ValueError):
+        codec.parse_cube(content)
+
+def test_decode_cube_rejects_truncated_data():
+    data = codec.decompress(codec.encode_cube(utils.initialize_random_cube(3, random.Random(2))))
+    with pytest.raises(ValueError):
+        codec.decode_cube(data[:-2])
+
+@pytest.mark.parametrize("method", codec.compression_methods())
+def test_run_round_trip(method):
+    cube = utils.initialize_random_cube(3, random.Random(3))
+    result = stochastic_algorithm(cube, seed=3, max_iteration=200)
+    fields = {"final_cost": result["final_cost"], "iteration": result["iteration"]}
+    decoded = codec.decode_run(codec.encode_run(result, fields, method))
+    assert decoded["final_cost"] == result["final_cost"]
+    assert decoded["iteration"] == result["iteration"]
+    assert decoded["final_cube"] == utils.unflatten_cube(result["final_cube"])
+    assert decoded["costs"] == result["costs"]
+    assert decoded["history"] == result["history"].to_dict()
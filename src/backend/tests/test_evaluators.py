@@ -0,0 +1,27 @@
+import random
+import pytest
+from algorithm import evaluators, utils
+from algorithm.costEngine import CostEngine
+
+@pytest.mark.parametrize("name", evaluators.available_backends())
+def test_backend_conforms_to_reference(name):
+    assert evaluators.check_conformance([name]) == {name: []}
+
+@pytest.mark.parametrize("N", [2, 3, 5])
+def test_swap_delta_matches_rescore(N):
+    rng = random.Random(N)
+    engine = CostEngine(utils.initialize_random_cube(N, rng))
+    reference = evaluators.evaluator('python')
+    for _ in range(50):
+        a, b = rng.sample(range(N ** 3), 2)
+        expected = engine.cost + engine.swap_delta(a, b)
+        engine.swap(a, b)
+        assert engine.cost == expected == reference.cost(engine.cells)
+        assert engine.sums == reference.line_sums(engine.cells, N)
+
+def test_objective_function_uses_selected_backend(monkeypatch):
+    cube = utils.initialize_random_cube(3, random.Random(0))
+    expected = evaluators.evaluator('python').cost(cube)
+    for name in evaluators.available_backends():
+        monkeypatch.setattr(evaluators, "select_backend", lambda name=name: name)
+        assert utils.objective_function(cube) == expected
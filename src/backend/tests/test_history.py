@@ -0,0 +1,45 @@
+import random
+from algorithm import stochastic_algorithm, utils
+from algorithm.history import StateHistory
+
+def record_run(N: int, steps: int, keyframe_interval: int, seed: int = 0):
+    rng = random.Random(seed)
+    history = StateHistory(utils.initialize_random_cube(N, rng), keyframe_interval)
+    states = []
+    current = history.initial[:]
+    for step in range(steps):
+        kind = rng.random()
+        if kind < 0.1:
+            current = utils.flatten_cube(utils.initialize_random_cube(N, rng))
+            history.record(state=current)
+        elif kind < 0.2:
+            history.record()
+        else:
+            a, b = rng.sample(range(N ** 3), 2)
+            current[a], current[b] = current[b], current[a]
+            history.record((a, b))
+        states.append(current[:])
+    return history, states
+
+def test_state_at_rebuilds_every_step():
+    history, states = record_run(3, 120, keyframe_interval=16)
+    assert len(history) == len(states)
+    for step, state in enumerate(states):
+        assert history.state_at(step) == state
+    assert history.state_at(-1) == states[-1]
+    assert list(history.states()) == states
+
+def test_to_dict_round_trip():
+    history, states = record_run(3, 80, keyframe_interval=7, seed=1)
+    restored = StateHistory.from_dict(history.to_dict(), keyframe_interval=5)
+    assert restored.initial == history.initial
+    assert restored.swaps == history.swaps
+    assert restored.full_states == history.full_states
+    assert list(restored.states()) == states
+
+def test_collect_run_ends_on_final_cube():
+    cube = utils.initialize_random_cube(3, random.Random(2))
+    result = stochastic_algorithm(cube, seed=2, max_iteration=300)
+    history = result["history"]
+    assert len(history) == len(result["costs"]) == result["iteration"]
+    assert history.state_at(-1) == result["final_cube"]
@@ -0,0 +1,67 @@
+import random
+import numpy as np
+import pytest
+from algorithm import utils
+from algorithm.batch import SwapDeltaTable, scan_best_swap
+from algorithm.costEngine import CostEngine
+from algorithm.genetic import CROSSOVER_OPERATORS, MUTATION_OPERATORS
+from algorithm.guided import GuidedProposer
+from algorithm.neighborhood import PairOrder, pair_count, pair_index
+from algorithm.tabu import tabu_search_stream
+
+# Crossover uniform menyalin sel per sel sehingga tidak menjaga permutasi
+@pytest.mark.parametrize("name", [name for name in sorted(CROSSOVER_OPERATORS) if name != "uniform"])
+def test_permutation_crossover_keeps_every_value(name):
+    rng = random.Random(0)
+    N = 3
+    for _ in range(20):
+        parent1 = utils.flatten_cube(utils.initialize_random_cube(N, rng))
+        parent2 = utils.flatten_cube(utils.initialize_random_cube(N, rng))
+        child = CROSSOVER_OPERATORS[name](parent1, parent2, N, rng)
+        assert sorted(child) == list(range(1, N ** 3 + 1))
+
+def test_swap_mutation_keeps_every_value():
+    rng = random.Random(1)
+    cube = utils.flatten_cube(utils.initialize_random_cube(3, rng))
+    mutated = MUTATION_OPERATORS["swap"](cube, 3, 0.3, rng, np.random.default_rng(1))
+    assert mutated != cube
+    assert sorted(mutated) == sorted(cube)
+
+def test_pair_order_visits_every_pair_once():
+    N = 3
+    indices = [int(pair_index(a, b, N)) for chunk in PairOrder(N, random.Random(2)).chunks(50) for a, b in chunk]
+    assert sorted(indices) == list(range(pair_count(N)))
+
+@pytest.mark.parametrize("N", [2, 3, 4])
+def test_lazy_scan_matches_delta_table(N):
+    engine = CostEngine(utils.initialize_random_cube(N, random.Random(N)))
+    delta, (a, b), scanned = scan_best_swap(engine, random.Random(N))
+    assert scanned == pair_count(N)
+    assert delta == SwapDeltaTable(engine).best()[0] == engine.swap_delta(a, b)
+
+def test_guided_proposer_moves_value_from_over_to_under_lines():
+    engine = CostEngine(utils.initialize_random_cube(4, random.Random(3)))
+    proposer = GuidedProposer(engine, guided=1.0, rng=random.Random(3))
+    cell_lines = utils.cell_line_table(engine.N)
+    for _ in range(100):
+        a, b = proposer.propose()
+        assert a != b
+        assert any(engine.sums[line] > engine.magic_number for line in cell_lines[a])
+        assert any(engine.sums[line] < engine.magic_number for line in cell_lines[b])
+        engine.swap(a, b)
+        proposer.update(a, b)
+
+def test_tabu_repeats_a_swap_only_for_a_new_best():
+    cube = utils.initialize_random_cube(3, random.Random(0))
+    best_cost = utils.objective_function(cube)
+    seen = set()
+    repeated = 0
+    # Tenure lebih panjang dari run: setiap swap yang diulang harus lewat aspiration
+    for event in tabu_search_stream(cube, tenure=10 ** 6, max_iteration=400, max_no_improvement=10 ** 6, seed=0):
+        pair = tuple(sorted(event["swap"]))
+        if pair in seen:
+            repeated += 1
+            assert event["cost"] < best_cost
+        seen.add(pair)
+        best_cost = min(best_cost, event["cost"])
+    assert repeated > 0
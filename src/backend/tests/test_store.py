@@ -0,0 +1,31 @@
+import random
+from algorithm import stochastic_algorithm, utils
+from store import ResultStore, decode_result, encode_result, result_key
+
+def test_result_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"))
+    cube = utils.initialize_random_cube(3, random.Random(0))
+    result = stochastic_algorithm(cube, seed=0, max_iteration=200)
+    key = result_key("stochastic", cube, {"seed": 0, "max_iteration": 200})
+    assert store.get(key) is None
+    store.put(key, "stochastic", encode_result(result))
+    restored = decode_result(store.get(key))
+    assert restored["final_cube"] == result["final_cube"]
+    assert restored["costs"] == result["costs"]
+    assert list(restored["history"].states()) == list(result["history"].states())
+    assert store.stats()["hits"] == store.stats()["misses"] == 1
+    store.close()
+
+def test_result_key_depends_on_budget():
+    cube = utils.initialize_random_cube(3, random.Random(1))
+    params = {"seed": 1}
+    assert result_key("stochastic", cube, params) == result_key("stochastic", cube, dict(params))
+    assert result_key("stochastic", cube, params) != result_key("stochastic", cube, params, {"time_limit": 1})
+
+def test_least_recently_read_results_are_evicted(tmp_path):
+    store = ResultStore(str(tmp_path / "results.db"), max_bytes=1)
+    store.put("old", "stochastic", {"costs": list(range(100))})
+    store.put("new", "stochastic", {"costs": list(range(100))})
+    assert store.get("old") is None
+    assert store.get("new") == {"costs": list(range(100))}
+    store.close()
@@ -9,6 +9,57 @@ import Genetic from "./components/Genetic";
 
 const API_URL = 'http://localhost:8000';
 
+// Step markers used by the backend swap log
+const NO_CHANGE = -1;
+const FULL_STATE = -2;
+// A copy of the cells is kept every this many steps
+const KEYFRAME_INTERVAL = 500;
+
+const toNestedCube = (cells, n) =>
+  Array.from({ length: n }, (_, i) =>
+    Array.from({ length: n }, (_, j) => cells.slice((i * n + j) * n, (i * n + j + 1) * n))
+  );
+
+// States of a run rebuilt on demand from its compact history (initial cube + swap log).
+// Only keyframes are stored; at(step) replays at most KEYFRAME_INTERVAL - 1 swaps from
+// the nearest one, or a single swap when the player moves forward one step.
+const historyStates = ({ initial, swaps, full_states }) => {
+  const n = initial.length;
+  const length = swaps.length / 2;
+
+  const apply = (cells, step) => {
+    const a = swaps[2 * step];
+    const b = swaps[2 * step + 1];
+    if (a === FULL_STATE) {
+      const state = full_states[step].flat(2);
+      cells.splice(0, cells.length, ...state);
+    } else if (a !== NO_CHANGE) {
+      [cells[a], cells[b]] = [cells[b], cells[a]];
+    }
+  };
+
+  const keyframes = [];
+  const cells = initial.flat(2);
+  for (let step = 0; step < length; step++) {
+    apply(cells, step);
+    if (step % KEYFRAME_INTERVAL === 0) keyframes.push(cells.slice());
+  }
+
+  let cursor = null;
+  const at = (step) => {
+    if (step < 0 || step >= length) return undefined;
+    if (!cursor || step < cursor.step || step - cursor.step >= KEYFRAME_INTERVAL) {
+      const start = step - (step % KEYFRAME_INTERVAL);
+      cursor = { step: start, cells: keyframes[start / KEYFRAME_INTERVAL].slice() };
+    }
+    for (let t = cursor.step + 1; t <= step; t++) apply(cursor.cells, t);
+    cursor.step = step;
+    return toNestedCube(cursor.cells, n);
+  };
+
+  return { length, at };
+};
+
 const App = () => {
   const [selectedAlgorithm, setSelectedAlgorithm] = useState(null);
   const [initialCube, setInitialCube] = useState(() => {
@@ -95,7 +146,7 @@ const App = () => {
       setDuration(result.duration);
       setIteration(result.iteration);
       setCosts(result.costs);
-      setStates(result.states);
+      setStates(result.states ?? historyStates(result.history));
       if (algorithmType === 'random') {
         setRestart(result.restart);
         setIterationRestart(result.iteration_restart);
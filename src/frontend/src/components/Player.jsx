@@ -29,7 +29,8 @@ export default function Player({
     maxIterations - 1
   );
 
-  const currentCubeState = states[currentCubeStateIndex];
+  // states is an array or a lazy history view; both support at()
+  const currentCubeState = states.at(currentCubeStateIndex);
 
   useEffect(() => {
     // Check if currentCubeStateIndex has crossed the next threshold in iterationRestart